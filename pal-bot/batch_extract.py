@@ -0,0 +1,140 @@
+from collections import defaultdict
+
+try:
+    import numpy as np
+except ImportError:  # Optional, extract_batch() then extracts sentence by sentence
+    np = None
+
+from english_dict import Category, EnglishDictionary
+
+# Joins the sentences of a batch so the whole batch is lowercased and split at once
+SEPARATOR = "\x00"
+
+
+def tokenize_batch(sentences, dictionary):
+    """
+    Tokenize a batch of sentences like extract_subject_verb_object does (lowercase, split on whitespace).
+
+    Every distinct word gets an integer ID and is categorized once, a token's category
+    mask is then one array index: masks_by_id[ids].
+
+    :return: Tuple of (word -> ID dict in ID order, token IDs of all sentences back to back,
+        token count per sentence, category mask per ID).
+    """
+    vocabulary = defaultdict()
+    vocabulary.default_factory = vocabulary.__len__  # Unknown words get the next free ID
+    text = f" {SEPARATOR} ".join(sentences)
+    if text.count(SEPARATOR) == len(sentences) - 1:
+        # Separators are tokens of their own, their positions give the sentence lengths
+        separator = vocabulary[SEPARATOR]
+        ids = np.fromiter(map(vocabulary.__getitem__, text.lower().split()), dtype=np.int64)
+        boundaries = np.flatnonzero(ids == separator)
+        lengths = np.diff(boundaries, prepend=-1, append=len(ids)) - 1
+        ids = np.delete(ids, boundaries)
+    else:  # A sentence contains the separator itself
+        token_ids = []
+        lengths = np.empty(len(sentences), dtype=np.int64)
+        for i, sentence in enumerate(sentences):
+            tokens = sentence.lower().split()
+            token_ids.extend(map(vocabulary.__getitem__, tokens))
+            lengths[i] = len(tokens)
+        ids = np.array(token_ids, dtype=np.int64)
+
+    masks_by_id = np.fromiter(map(dictionary.categorize, vocabulary), dtype=np.uint8, count=len(vocabulary))
+    return vocabulary, ids, lengths, masks_by_id
+
+
+def extract_batch(sentences, dictionary=None, chunk_size=20000):
+    """
+    Extract (subject, verb, object, adjective) of many sentences at once.
+
+    Returns exactly what PalChatbot.extract_subject_verb_object returns for each sentence.
+    Its token loop is a small state machine whose every step is "the first token of the
+    sentence after position p with category bit b", so the batch is resolved with a few
+    whole-array operations and one minimum per sentence range (np.minimum.reduceat) per
+    step instead of a Python loop per token. Without NumPy the sentences are extracted
+    one by one.
+
+    :param chunk_size: Sentences resolved together. Larger chunks gain nothing once the
+        NumPy calls are amortized, they only hold more token strings in memory at once.
+    """
+    dictionary = dictionary or EnglishDictionary()
+    sentences = list(sentences)
+    if np is None:
+        from sophisticated import PalChatbot
+        bot = PalChatbot(dictionary=dictionary)
+        return [bot.extract_subject_verb_object(sentence) for sentence in sentences]
+
+    results = []
+    for start in range(0, len(sentences), chunk_size):
+        results.extend(_extract_chunk(sentences[start:start + chunk_size], dictionary))
+    return results
+
+
+def _extract_chunk(sentences, dictionary):
+    vocabulary, ids, lengths, masks_by_id = tokenize_batch(sentences, dictionary)
+    count = len(ids)
+    if count == 0:
+        return [(None, None, None, None)] * len(sentences)
+
+    # Per token arrays have one extra slot past the last token, the "none" sentinel with ID -1 and no categories
+    ids_or_none = np.append(ids, -1)
+    masks = np.append(masks_by_id, 0)[ids_or_none]
+    is_subject = (masks & Category.SUBJECTS.bit) != 0
+    is_verb = (masks & Category.VERBS.bit) != 0
+    is_object = (masks & Category.OBJECTS.bit) != 0
+    is_adjective = (masks & Category.ADJECTIVES.bit) != 0
+
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    position = np.arange(count + 1)
+    bounds = np.empty(2 * len(sentences), dtype=np.int64)
+
+    def first(condition, begin=starts):
+        # Flat position of the first token in [begin, end) of each sentence meeting the condition, count if none
+        candidates = np.where(condition, position, count)
+        begin = np.minimum(begin, ends)
+        bounds[0::2] = begin
+        bounds[1::2] = ends
+        result = np.minimum.reduceat(candidates, bounds)[0::2]
+        result[begin == ends] = count
+        return result
+
+    def flags(positions):
+        # Per token flag set at the given positions
+        flagged = np.zeros(count + 1, dtype=bool)
+        flagged[positions] = True
+        return flagged
+
+    # Subject: the first subject word, or "the" followed by an object word of the same sentence
+    the_id = vocabulary.get("the", -1)
+    the_object = np.zeros(count + 1, dtype=bool)
+    the_object[:-1] = (ids_or_none[:-1] == the_id) & is_object[1:] & ~flags(ends - 1)[:-1]
+    subject = first(the_object | is_subject)
+    subject_is_the = the_object[subject]
+    skipped = np.where(subject_is_the, subject + 1, count)  # The object word of "the <object>"
+    subject_last = np.where(subject_is_the, subject + 1, subject)
+    subject_last_id = ids_or_none[subject_last]
+
+    # Verb: the first verb word after the subject
+    verb = first(is_verb & ~flags(skipped), subject + 1)
+    # Object: the first object word after that verb, unless it repeats the subject's last word
+    not_subject_word = np.ones(count + 1, dtype=bool)
+    not_subject_word[:-1] = ids != np.repeat(subject_last_id, lengths)
+    obj = first(is_object & not_subject_word, verb + 1)
+    # Adjective: the first adjective word no other component took
+    adjective = first(is_adjective & ~flags(np.concatenate((subject, skipped, verb, obj))))
+
+    # The scalar fallbacks: any verb, object or adjective word of the sentence
+    verb = np.where(verb < count, verb, first(is_verb))
+    obj = np.where(obj < count, obj, first(is_object & not_subject_word))
+    adjective = np.where(adjective < count, adjective, first(is_adjective))
+
+    lookup = list(vocabulary) + [None]  # Insertion order is ID order, ID -1 is "none"
+    subjects = [lookup[word] for word in subject_last_id.tolist()]
+    return [
+        (f"the {subject_word}" if is_the else subject_word, lookup[verb_id], lookup[obj_id], lookup[adjective_id])
+        for subject_word, is_the, verb_id, obj_id, adjective_id in zip(
+            subjects, subject_is_the.tolist(), ids_or_none[verb].tolist(), ids_or_none[obj].tolist(),
+            ids_or_none[adjective].tolist())
+    ]
@@ -0,0 +1,372 @@
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import re
+import resource
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Timing helpers are shared with the witness benchmark and tools/bench.py, they live in shared/
+SHARED_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shared")
+if SHARED_DIR not in sys.path:
+    sys.path.insert(0, SHARED_DIR)
+
+from batch_extract import extract_batch
+from bench_timing import percentile, time_per_input
+from english_dict import Category, EnglishDictionary, Lexicon
+from matcher import PatternMatcher
+from normalizer import CONTRACTIONS, Normalizer
+from pal_rules import RULES_PATH, RuleReloader, default_rules, load_rules
+from simple import PalChatbot
+import sophisticated
+from turn_cache import TurnCache
+
+
+def _synthetic_rules(count, rng):
+    """
+    Build a keyword rule table shaped like simple.py: word-bounded keywords and a few alternations.
+    """
+    rules = []
+    for i in range(count):
+        if i % 10 == 0:
+            rules.append(rf"\b(topic{i}|subject{i}|theme{i})\b")
+        elif i % 10 == 1:
+            rules.append(rf"\bhow\s+about\s+item{i}\b\??")
+        else:
+            rules.append(rf"\bword{i}\b")
+    rng.shuffle(rules)
+    return rules
+
+
+def bench_matcher(sizes=(20, 500, 5000), seed=42):
+    """
+    Compare the compiled PatternMatcher against the per-rule re.search loop of simple.py.
+    """
+    rng = random.Random(seed)
+    print("rules  loop (us/turn)  matcher (us/turn)  speedup")
+    for size in sizes:
+        rules = _synthetic_rules(size, rng)
+        inputs = []
+        # The loop gets very slow on large tables (re's pattern cache holds 512 entries)
+        for _ in range(max(20, 20000 // size)):
+            words = ["I", "really", "think", "that", "today", "was", "a", "long", "day"]
+            # Roughly half the inputs hit a random rule, the rest fall through to the fallback
+            if rng.random() < 0.5:
+                words.insert(rng.randrange(len(words)), f"word{rng.randrange(size)}")
+            inputs.append(" ".join(words))
+
+        def loop(text):
+            for pattern in rules:
+                if re.search(pattern, text, re.IGNORECASE):
+                    return pattern
+            return None
+
+        matcher = PatternMatcher(rules, re.IGNORECASE)
+        for text in inputs:
+            expected = loop(text)
+            found = matcher.first_match(text)
+            assert (rules[found] if found is not None else None) == expected, text
+
+        loop_time = time_per_input(loop, inputs)
+        matcher_time = time_per_input(matcher.first_match, inputs)
+        print(f"{size:5d}  {loop_time:14.1f}  {matcher_time:17.1f}  {loop_time / matcher_time:6.1f}x")
+
+
+def _legacy_normalize(text):
+    """
+    normalize_text as it was before normalizer.py: one re.sub pass per contraction.
+    """
+    for shortform, longform in CONTRACTIONS.items():
+        text = re.sub(rf"\b{shortform}\b", longform, text, flags=re.IGNORECASE)
+    return text
+
+
+def bench_normalize(paragraph_counts=(1, 10, 100), seed=42):
+    """
+    Compare the compiled Normalizer against the per-contraction re.sub loop on multi-paragraph inputs.
+    """
+    rng = random.Random(seed)
+    vocabulary = list(CONTRACTIONS) + ["I'M", "Don't", "really", "think", "school", "sad", "today", "my", "friends"] * 4
+    normalizer = Normalizer()
+    print("paragraphs  chars   legacy (MB/s)  pipeline (MB/s)  speedup")
+    for count in paragraph_counts:
+        paragraphs = []
+        for _ in range(count):
+            sentences = [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(5, 20))) + "." for _ in range(5)]
+            paragraphs.append(" ".join(sentences))
+        text = "\n\n".join(paragraphs)
+        assert normalizer(text) == _legacy_normalize(text)
+
+        legacy_time = time_per_input(_legacy_normalize, [text])
+        pipeline_time = time_per_input(normalizer, [text])
+        print(f"{count:10d}  {len(text):6d}  {len(text) / legacy_time:13.1f}  {len(text) / pipeline_time:15.1f}  {legacy_time / pipeline_time:6.1f}x")
+
+
+async def _client_session(path, turns, latencies, rng):
+    reader, writer = await asyncio.open_unix_connection(path)
+    await reader.readline()  # Opening line
+    messages = ["Tom", "yes"] + [rng.choice(["I am sad.", "The school makes me angry.", "I don't know.", "My friends love music"]) for _ in range(turns)]
+    for message in messages:
+        start = time.perf_counter()
+        writer.write(message.encode() + b"\n")
+        await writer.drain()
+        await reader.readline()
+        latencies.append(time.perf_counter() - start)
+    writer.write(b"exit\n")
+    await writer.drain()
+    await reader.read()
+    writer.close()
+
+
+async def _load(path, sessions, turns, seed):
+    rng = random.Random(seed)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_client_session(path, turns, latencies, rng) for _ in range(sessions)))
+    return time.perf_counter() - start, latencies
+
+
+def bench_server(session_counts=(100, 1000, 5000), turns=10, seed=42):
+    """
+    Load test server.py: many concurrent sessions against one server process on a Unix socket.
+    """
+    print("sessions  turns/s  p50 (ms)  p99 (ms)  server CPU (s)  turns per CPU-second")
+    for sessions in session_counts:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "pal.sock")
+            server = subprocess.Popen([sys.executable, "server.py", "--unix", path, "--max-sessions", str(sessions)],
+                                      cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.PIPE)
+            server.stdout.readline()  # Wait until the server listens
+            cpu_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+            elapsed, latencies = asyncio.run(_load(path, sessions, turns, seed))
+
+            server.send_signal(signal.SIGINT)
+            server.wait()
+            cpu_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = (cpu_after.ru_utime + cpu_after.ru_stime) - (cpu_before.ru_utime + cpu_before.ru_stime)
+        print(f"{sessions:8d}  {len(latencies) / elapsed:7.0f}  {percentile(latencies, 0.5) * 1e3:8.2f}  "
+              f"{percentile(latencies, 0.99) * 1e3:8.2f}  {cpu:14.2f}  {len(latencies) / cpu:20.0f}")
+
+
+# Run in a fresh interpreter: load a bundle and answer one turn, print both times in seconds
+_STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from pal_rules import load_rules
+from simple import PalChatbot
+rules = load_rules(sys.argv[1], sys.argv[2] or None)
+loaded = time.perf_counter()
+PalChatbot(rules=rules).respond("I really think that word7 was a long day")
+print(loaded - start, time.perf_counter() - loaded)
+"""
+
+
+def bench_startup(sizes=(500, 10000), seed=42):
+    """
+    Cold start of a Pal process with a large rule bundle, with and without the precompiled cache.
+    """
+    rng = random.Random(seed)
+    with open(RULES_PATH, encoding="utf-8") as file:
+        bundle = json.load(file)
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    def start(path, cache_dir):
+        output = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT, path, cache_dir],
+                                cwd=here, check=True, capture_output=True, text=True).stdout
+        return [float(value) * 1e3 for value in output.split()]
+
+    print("rules  bundle (KB)  no cache (ms)  building cache (ms)  cached (ms)  first turn (ms)")
+    for size in sizes:
+        keywords = [{"pattern": pattern, "responses": [f"Tell me more about {i}.", f"What about {i}?"]}
+                    for i, pattern in enumerate(_synthetic_rules(size, rng))]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "rules.json")
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(dict(bundle, keywords=keywords), file)
+            cache_dir = os.path.join(directory, "cache")
+
+            uncached = min(start(path, "")[0] for _ in range(3))
+            building = start(path, cache_dir)[0]
+            cached, first_turn = min(start(path, cache_dir) for _ in range(3))
+            print(f"{size:5d}  {os.path.getsize(path) / 1024:11.0f}  {uncached:13.1f}  {building:19.1f}  "
+                  f"{cached:11.1f}  {first_turn:15.2f}")
+
+
+def bench_reload(size=10000, seconds=2.0, seed=42):
+    """
+    Turn latency of running sessions while a changed 10k-rule bundle is compiled and swapped in.
+    """
+    rng = random.Random(seed)
+    with open(RULES_PATH, encoding="utf-8") as file:
+        bundle = json.load(file)
+    inputs = ["I am sad because of school", "I really think that word7 was a long day", "My mother was angry", "Nothing"]
+
+    def run_turns(bots, duration):
+        latencies = []
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            bot = rng.choice(bots)
+            start = time.perf_counter()
+            bot.respond(rng.choice(inputs))
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "rules.json")
+
+        def write_bundle(count):
+            keywords = [{"pattern": pattern, "responses": [f"Tell me more about {i}."]}
+                        for i, pattern in enumerate(_synthetic_rules(count, rng))]
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(dict(bundle, keywords=bundle["keywords"] + keywords), file)
+
+        write_bundle(size)
+        reloader = RuleReloader(path, interval=0.05, cache_dir=None)
+        bots = [PalChatbot(rng=random.Random(i)) for i in range(100)]  # Sessions follow the process-wide rules
+
+        print("phase            turns  p50 (us)  p99 (us)  max (ms)  generation")
+        for phase in ("steady", "reloading"):
+            if phase == "reloading":
+                write_bundle(size + 1)
+                reloader.start()
+            latencies = run_turns(bots, seconds)
+            print(f"{phase:14s}  {len(latencies):7d}  {percentile(latencies, 0.5) * 1e6:8.1f}  "
+                  f"{percentile(latencies, 0.99) * 1e6:8.1f}  {max(latencies) * 1e3:8.2f}  {default_rules().generation:10d}")
+        reloader.stop()
+
+    for generation in reloader.snapshot():
+        top = sorted(generation["hits"].items(), key=lambda item: -item[1])[:3]
+        print(f"generation {generation['generation']}: {sum(generation['hits'].values())} turns, top rules {top}")
+
+
+def _bytes_per_session(make_bot, sessions, turns, seed):
+    """
+    Memory allocated per session for `sessions` bots that each answered `turns` turns.
+    """
+    make_bot(random.Random(seed)).respond("warm up")  # Shared tables are not part of a session
+    rng = random.Random(seed)
+    messages = ["Tom", "yes", "I am sad.", "The school makes me angry.", "I don't know.", "My friends love music"]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    bots = [make_bot(random.Random(i)) for i in range(sessions)]
+    for bot in bots:
+        for turn in range(turns):
+            bot.respond(messages[turn] if turn < 2 else rng.choice(messages))
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return allocated / sessions
+
+
+def _own_dictionary():
+    dictionary = EnglishDictionary.__new__(EnglishDictionary)
+    dictionary.lexicon = Lexicon({category: getattr(EnglishDictionary, category.value) for category in Category})
+    return dictionary
+
+
+def bench_memory(sessions=10000, turns=(0, 10), seed=42):
+    """
+    Bytes per session with the shared rule tables and lexicon versus a private copy per session.
+
+    A session's own random.Random alone takes about 2.5 KB, the "no rng" rows leave it out.
+    """
+    layouts = {
+        "simple, shared": lambda rng: PalChatbot(rng=rng),
+        "simple, shared, no rng": lambda rng: PalChatbot(),
+        "simple, own tables": lambda rng: PalChatbot(rng=rng, rules=load_rules(cache_dir=None)),
+        "sophisticated, shared": lambda rng: sophisticated.PalChatbot(rng=rng),
+        "sophisticated, shared, no rng": lambda rng: sophisticated.PalChatbot(),
+        "sophisticated, own tables": lambda rng: sophisticated.PalChatbot(dictionary=_own_dictionary(), rng=rng,
+                                                                          rules=load_rules(cache_dir=None)),
+    }
+    print("layout                          " + "".join(f"{turn:>4d} turns (B)" for turn in turns))
+    for name, make_bot in layouts.items():
+        count = sessions if "own" not in name else sessions // 20  # Private tables are large, fewer suffice
+        sizes = [_bytes_per_session(make_bot, count, turn, seed) for turn in turns]
+        print(f"{name:30s}  " + "".join(f"{size:14.0f}" for size in sizes))
+
+
+def bench_batch(sizes=(1000, 10000, 100000, 1000000), seed=42):
+    """
+    Batch extraction of subject, verb, object and adjective against one extract_subject_verb_object call per sentence.
+    """
+    dictionary = EnglishDictionary()
+    bot = sophisticated.PalChatbot(dictionary=dictionary)
+    rng = random.Random(seed)
+    vocabulary = sorted(dictionary.lexicon.lookup(Category.SUBJECTS) | dictionary.lexicon.lookup(Category.VERBS) |
+                        dictionary.lexicon.lookup(Category.OBJECTS) | dictionary.lexicon.lookup(Category.ADJECTIVES))
+    vocabulary += ["the", "a", "and", "really", "today", "because", "very"] * 10  # Unknown and filler words
+    sentences = [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 15))) for _ in range(max(sizes))]
+
+    print("sentences  per sentence (s)  batch (s)  speedup  identical")
+    for size in sizes:
+        batch = sentences[:size]
+        gc.disable()  # Like timeit: collections of the millions of result tuples would dominate both timings
+        try:
+            start = time.perf_counter()
+            expected = [bot.extract_subject_verb_object(sentence) for sentence in batch]
+            scalar_time = time.perf_counter() - start
+            start = time.perf_counter()
+            result = extract_batch(batch, dictionary)
+            batch_time = time.perf_counter() - start
+        finally:
+            gc.enable()
+        print(f"{size:9d}  {scalar_time:16.3f}  {batch_time:9.3f}  {scalar_time / batch_time:6.1f}x  {result == expected}")
+
+
+def bench_cache(turns=50000, unique_share=(0.0, 0.2, 0.5), seed=42):
+    """
+    Chat turns per second of sophisticated.py with and without the turn cache on repetitive traffic.
+
+    Inputs repeat with a Zipf-like distribution over common replies, a share of the turns is unique text.
+    """
+    dictionary = EnglishDictionary()
+    common = ["I'm sad", "I don't know", "yes", "no", "My friends love music.", "The school makes me angry!",
+              "I like math", "I can't sleep. I'm tired", "my mother is happy", "why?", "I hate homework",
+              "We're bored", "I really think that the teacher is nice", "maybe", "It's fine, I guess"]
+    weights = [1 / rank for rank in range(1, len(common) + 1)]
+
+    print("unique  no cache (turns/s)  cache (turns/s)  speedup  sentence hit rate  component hit rate")
+    for share in unique_share:
+        rng = random.Random(seed)
+        inputs = [f"I saw {rng.randrange(10 ** 9)} birds. You are {rng.random():.6f} nice" if rng.random() < share
+                  else rng.choices(common, weights)[0] for _ in range(turns)]
+        results = {}
+        for name, cache in (("off", TurnCache(max_size=0)), ("on", TurnCache())):
+            bot = sophisticated.PalChatbot(dictionary=dictionary, rng=random.Random(seed), cache=cache)
+            bot.stage = sophisticated.CHAT
+            start = time.perf_counter()
+            for text in inputs:
+                bot.respond(text)
+            results[name] = (turns / (time.perf_counter() - start), cache.snapshot())
+        (off, _), (on, snapshot) = results["off"], results["on"]
+        print(f"{share:6.0%}  {off:18.0f}  {on:15.0f}  {on / off:6.1f}x  {snapshot['sentences']['hit_rate']:17.1%}  "
+              f"{snapshot['components']['hit_rate']:18.1%}")
+
+
+BENCHMARKS = {
+    "matcher": bench_matcher,
+    "normalize": bench_normalize,
+    "server": bench_server,
+    "startup": bench_startup,
+    "reload": bench_reload,
+    "memory": bench_memory,
+    "batch": bench_batch,
+    "cache": bench_cache,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pal-Bot micro benchmarks")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    args = parser.parse_args()
+
+    for name in args.names or BENCHMARKS:
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
@@ -1,3 +1,4 @@
+import itertools
 from enum import Enum
 
 class Category(Enum):
@@ -6,33 +7,104 @@ class Category(Enum):
     OBJECTS = "objects"
     ADJECTIVES = "adjectives"
 
+    @property
+    def bit(self):
+        """
+        Bit of this category in a word's category bitmask.
+        """
+        return CATEGORY_BITS[self]
+
+CATEGORY_BITS = {category: 1 << position for position, category in enumerate(Category)}
+
+# Every lexicon built in this process gets its own version, caches of categorized words key on it
+_lexicon_versions = itertools.count(1)
+
+def next_lexicon_version():
+    """
+    Return a version number no other lexicon of this process has.
+    """
+    return next(_lexicon_versions)
+
+class Lexicon:
+    """
+    In-memory word index: one frozenset per category and a word -> category bitmask map.
+    """
+    def __init__(self, words_by_category):
+        self.version = next_lexicon_version()
+        self._sets = {category: frozenset(words_by_category.get(category, ())) for category in Category}
+        self._masks = {}
+        for category, words in self._sets.items():
+            for word in words:
+                self._masks[word] = self._masks.get(word, 0) | category.bit
+
+    def __len__(self):
+        return len(self._masks)
+
+    def categorize(self, word):
+        return self._masks.get(word, 0)
+
+    def lookup(self, category):
+        return self._sets.get(category, frozenset())
+
 class EnglishDictionary:
-    def __init__(self):
-        self.subjects = [
-            "I", "he", "she", "we", "they", "it", "my", "you", "someone", "everyone", "nobody",
-            "people", "children", "parents", "students", "teachers", "animals", "friends", "neighbors"
-        ]
-        self.verbs = [
-            "am", "is", "are", "feel", "like", "love", "hate", "remember", "think", "makes",
-            "want", "say", "see", "need", "know", "believe", "run", "walk", "write", "read",
-            "speak", "listen", "eat", "drink", "play", "work", "sleep", "study", "help", "create"
-        ]
-        self.objects = [
-            "school", "homework", "sports", "friends", "movies", "books", "death", "life",
-            "food", "music", "family", "phone", "internet", "job", "car", "house", "garden",
-            "computer", "game", "city", "country", "ocean", "mountain", "river", "forest", "sky"
-        ]
-        self.adjectives = [
-            "happy", "sad", "angry", "bored", "lonely", "excited", "tired", "confused",
-            "frustrated", "nervous", "anxious", "thrilled", "beautiful", "ugly", "strong",
-            "weak", "fast", "slow", "smart", "kind", "brave", "funny", "serious", "friendly"
-        ]
+    __slots__ = ("lexicon",)
+
+    # Built-in word lists and their lexicon, built once and shared by every instance
+    subjects = [
+        "I", "he", "she", "we", "they", "it", "my", "you", "someone", "everyone", "nobody",
+        "people", "children", "parents", "students", "teachers", "animals", "friends", "neighbors"
+    ]
+    verbs = [
+        "am", "is", "are", "feel", "like", "love", "hate", "remember", "think", "makes",
+        "want", "say", "see", "need", "know", "believe", "run", "walk", "write", "read",
+        "speak", "listen", "eat", "drink", "play", "work", "sleep", "study", "help", "create"
+    ]
+    objects = [
+        "school", "homework", "sports", "friends", "movies", "books", "death", "life",
+        "food", "music", "family", "phone", "internet", "job", "car", "house", "garden",
+        "computer", "game", "city", "country", "ocean", "mountain", "river", "forest", "sky"
+    ]
+    adjectives = [
+        "happy", "sad", "angry", "bored", "lonely", "excited", "tired", "confused",
+        "frustrated", "nervous", "anxious", "thrilled", "beautiful", "ugly", "strong",
+        "weak", "fast", "slow", "smart", "kind", "brave", "funny", "serious", "friendly"
+    ]
+    _builtin_lexicon = None
+
+    def __init__(self, path=None):
+        """
+        :param path: Optional lexicon file (see lexicon_file.py) to memory-map instead of the built-in word lists.
+        """
+        if path is not None:
+            from lexicon_file import MappedLexicon
+            self.lexicon = MappedLexicon(path)
+            return
+
+        if EnglishDictionary._builtin_lexicon is None:
+            EnglishDictionary._builtin_lexicon = Lexicon({category: getattr(self, category.value) for category in Category})
+        self.lexicon = EnglishDictionary._builtin_lexicon
 
     def lookup(self, category: Category):
         """
         Lookup words by category.
 
         :param category: The category to look up (Category Enum).
-        :return: List of words in the specified category or an empty list if the category is invalid.
+        :return: Frozenset of words in the specified category or an empty set if the category is invalid.
+        """
+        return self.lexicon.lookup(category)
+
+    def categorize(self, word):
+        """
+        Classify a word with a single hash lookup.
+
+        :param word: The word to classify (case-sensitive).
+        :return: Bitmask of the categories (see Category.bit) the word belongs to, 0 if unknown.
+        """
+        return self.lexicon.categorize(word)
+
+    @property
+    def version(self):
+        """
+        Version of the current lexicon, it changes whenever another lexicon is assigned.
         """
-        return getattr(self, category.value, [])
\ No newline at end of file
+        return self.lexicon.version
@@ -0,0 +1,176 @@
+import argparse
+import mmap
+import struct
+import sys
+
+from english_dict import Category, next_lexicon_version
+
+# File layout (all integers little-endian uint32):
+#   header       magic, word count N, category count C, size of the string blob
+#   offsets      N + 1 offsets into the blob, word i is blob[offsets[i]:offsets[i + 1]]
+#   blob         UTF-8 words sorted by their encoded bytes
+#   bit arrays   C arrays of ceil(N / 8) bytes, bit i is set if word i is in the category
+MAGIC = b"PALLEX01"
+HEADER = struct.Struct("<8sIII")
+OFFSET = struct.Struct("<I")
+
+
+def write_lexicon(path, words_by_category):
+    """
+    Write a binary lexicon file.
+
+    :param path: Target file path.
+    :param words_by_category: Mapping of Category to an iterable of words.
+    """
+    categories = list(Category)
+    encoded = {}
+    for category in categories:
+        for word in words_by_category.get(category, ()):
+            encoded.setdefault(word.encode("utf-8"), set()).add(category)
+
+    words = sorted(encoded)
+    offsets = [0]
+    for word in words:
+        offsets.append(offsets[-1] + len(word))
+
+    bit_arrays = {category: bytearray((len(words) + 7) // 8) for category in categories}
+    for i, word in enumerate(words):
+        for category in encoded[word]:
+            bit_arrays[category][i >> 3] |= 1 << (i & 7)
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(words), len(categories), offsets[-1]))
+        file.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        file.write(b"".join(words))
+        for category in categories:
+            file.write(bit_arrays[category])
+
+
+class CategoryView:
+    """
+    Read-only set-like view of the words of one category, decoded only on iteration.
+    """
+    def __init__(self, lexicon, category):
+        self._lexicon = lexicon
+        self._category = category
+
+    def __contains__(self, word):
+        return bool(self._lexicon.categorize(word) & self._category.bit)
+
+    def __iter__(self):
+        for i in range(self._lexicon.word_count):
+            if self._lexicon._has_bit(self._category, i):
+                yield self._lexicon._word(i)
+
+    def __len__(self):
+        start = self._lexicon._bit_array_start(self._category)
+        return int.from_bytes(self._lexicon._map[start:start + self._lexicon._bit_array_size], "little").bit_count()
+
+
+class MappedLexicon:
+    """
+    Lexicon backed by a memory-mapped lexicon file.
+
+    The file is mapped read-only, so all bot processes loading the same file share its
+    pages through the OS page cache. Lookups binary search the sorted string table and
+    only decode the words they touch.
+    """
+    def __init__(self, path):
+        self.version = next_lexicon_version()
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.word_count, category_count, blob_size = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a lexicon file")
+        if category_count != len(Category):
+            raise ValueError(f"{path} has {category_count} categories, expected {len(Category)}")
+
+        self._offsets_start = HEADER.size
+        self._blob_start = self._offsets_start + OFFSET.size * (self.word_count + 1)
+        self._bits_start = self._blob_start + blob_size
+        self._bit_array_size = (self.word_count + 7) // 8
+        self._category_positions = {category: position for position, category in enumerate(Category)}
+
+        # View the offset table in place (no copy) where the native byte order matches the file
+        self._offsets = None
+        if sys.byteorder == "little":
+            self._offsets = memoryview(self._map)[self._offsets_start:self._blob_start].cast("I")
+        self._blob = memoryview(self._map)[self._blob_start:self._bits_start]
+
+    def __len__(self):
+        return self.word_count
+
+    def close(self):
+        if self._offsets is not None:
+            self._offsets.release()
+        self._blob.release()
+        self._map.close()
+
+    def _offset(self, i):
+        if self._offsets is not None:
+            return self._offsets[i]
+        return OFFSET.unpack_from(self._map, self._offsets_start + OFFSET.size * i)[0]
+
+    def _encoded_word(self, i):
+        return self._blob[self._offset(i):self._offset(i + 1)].tobytes()
+
+    def _word(self, i):
+        return self._encoded_word(i).decode("utf-8")
+
+    def _bit_array_start(self, category):
+        return self._bits_start + self._category_positions[category] * self._bit_array_size
+
+    def _has_bit(self, category, i):
+        return self._map[self._bit_array_start(category) + (i >> 3)] >> (i & 7) & 1
+
+    def _find(self, word):
+        """
+        Binary search the string table, return the word's index or -1.
+        """
+        key = word.encode("utf-8")
+        low, high = 0, self.word_count
+        while low < high:
+            middle = (low + high) // 2
+            probe = self._encoded_word(middle)
+            if probe < key:
+                low = middle + 1
+            elif probe > key:
+                high = middle
+            else:
+                return middle
+        return -1
+
+    def categorize(self, word):
+        i = self._find(word)
+        if i < 0:
+            return 0
+        mask = 0
+        for category in Category:
+            if self._has_bit(category, i):
+                mask |= category.bit
+        return mask
+
+    def lookup(self, category):
+        return CategoryView(self, category)
+
+
+def _read_word_list(path):
+    with open(path, encoding="utf-8") as file:
+        return [line.strip() for line in file if line.strip() and not line.startswith("#")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert plain word lists (one word per line) into a lexicon file.")
+    parser.add_argument("output", help="lexicon file to write")
+    for category in Category:
+        parser.add_argument(f"--{category.value}", metavar="FILE", action="append", default=[],
+                            help=f"word list with {category.value} (can be given multiple times)")
+    args = parser.parse_args()
+
+    words_by_category = {
+        category: [word for path in getattr(args, category.value) for word in _read_word_list(path)]
+        for category in Category
+    }
+    write_lexicon(args.output, words_by_category)
+    print(f"Wrote {len(MappedLexicon(args.output))} words to {args.output}")
@@ -0,0 +1,162 @@
+import re
+import time
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+
+GRAM_SIZE = 3
+
+
+def _required_factors(items):
+    """
+    Find literal strings of which at least one must occur in every match of a parsed pattern.
+
+    :param items: A parsed (sub)pattern as returned by sre_parse.
+    :return: List of lowercase literals or None if no such guarantee can be derived.
+    """
+    candidates = []
+    run = []
+
+    def close_run():
+        if run:
+            candidates.append(["".join(run).lower()])
+            run.clear()
+
+    for op, value in items:
+        if op is sre_constants.LITERAL:
+            run.append(chr(value))
+        elif op is sre_constants.AT:
+            continue  # Zero-width anchors do not interrupt a literal run
+        else:
+            close_run()
+            if op is sre_constants.SUBPATTERN:
+                factors = _required_factors(value[-1])
+            elif op is sre_constants.BRANCH:
+                factors = []
+                for branch in value[1]:
+                    branch_factors = _required_factors(branch)
+                    if branch_factors is None:
+                        factors = None
+                        break
+                    factors.extend(branch_factors)
+            elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and value[0] >= 1:
+                factors = _required_factors(value[2])
+            else:
+                factors = None
+            if factors:
+                candidates.append(factors)
+    close_run()
+
+    if not candidates:
+        return None
+    # Prefer the alternative whose shortest literal is longest, it filters best
+    return max(candidates, key=lambda factors: min(len(factor) for factor in factors))
+
+
+def _grams(text):
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class PatternMatcher:
+    """
+    Match a whole table of regex rules against a text with a single scan of the input.
+
+    From the parse tree of every rule we derive literals that any match must contain
+    and index the rule by one character trigram of each literal. A turn collects the
+    trigrams of the input in one pass, which yields the few rules that can possibly
+    match, and only those are verified, in table order. The first verified rule is the
+    same rule a `for pattern in rules: re.search(...)` loop would return.
+
+    Only ASCII literals are indexed and only ASCII input is filtered: re.IGNORECASE
+    folds single characters ("İ" and "ı" match "i", "ſ" matches "s", "K" matches "k"),
+    which str.lower() does not, so anything else is verified rule by rule.
+
+    A rule is compiled the first time it is a candidate, so a large table that was
+    loaded from a pickle is ready without compiling anything.
+    """
+
+    def __init__(self, patterns, flags=0):
+        self.patterns = list(patterns)
+        self.flags = flags
+        self.compiled = [None] * len(self.patterns)
+
+        self._index = {}
+        self._unindexed = []
+        for rule, pattern in enumerate(self.patterns):
+            factors = _required_factors(sre_parse.parse(pattern, flags))
+            if not factors or any(len(factor) < GRAM_SIZE or not factor.isascii() for factor in factors):
+                self._unindexed.append(rule)
+                continue
+            for factor in factors:
+                # Key each literal on its least crowded trigram to keep buckets small
+                gram = min(_grams(factor), key=lambda g: (len(self._index.get(g, ())), g))
+                self._index.setdefault(gram, []).append(rule)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def __getstate__(self):
+        # Compiled patterns are not pickled, they are rebuilt lazily after loading
+        state = self.__dict__.copy()
+        state["compiled"] = [None] * len(self.patterns)
+        return state
+
+    def compile(self, rule):
+        """
+        Return the compiled pattern of a rule.
+        """
+        compiled = self.compiled[rule]
+        if compiled is None:
+            compiled = self.compiled[rule] = re.compile(self.patterns[rule], self.flags)
+        return compiled
+
+    def candidates(self, text):
+        """
+        Return the sorted indices of all rules that may match the text.
+        """
+        if not text.isascii():
+            return range(len(self.patterns))  # Case folding of the input differs from str.lower()
+        index = self._index
+        rules = set(self._unindexed)
+        for gram in _grams(text.lower()):
+            bucket = index.get(gram)
+            if bucket:
+                rules.update(bucket)
+        return sorted(rules)
+
+    def search(self, text, metrics=None):
+        """
+        Find the highest priority rule matching anywhere in the text.
+
+        :param text: The text to scan.
+        :param metrics: Optional Metrics (see shared/stage_metrics.py) counting the attempts, matches and
+            cost of every verified rule by its pattern.
+        :return: Tuple of (rule index, match object) or None if no rule matches.
+        """
+        if metrics is not None and metrics.enabled:
+            return self._search_observed(text, metrics)
+        for rule in self.candidates(text):
+            match = self.compile(rule).search(text)
+            if match:
+                return rule, match
+        return None
+
+    def _search_observed(self, text, metrics):
+        for rule in self.candidates(text):
+            start = time.perf_counter()
+            match = self.compile(rule).search(text)
+            metrics.rule(self.patterns[rule], match is not None, time.perf_counter() - start)
+            if match:
+                return rule, match
+        return None
+
+    def first_match(self, text, metrics=None):
+        """
+        Return the index of the winning rule or None.
+        """
+        result = self.search(text, metrics)
+        return result[0] if result else None
@@ -0,0 +1,104 @@
+import re
+
+CONTRACTIONS = {
+    "i'm": "I am",
+    "you're": "you are",
+    "he's": "he is",
+    "she's": "she is",
+    "it's": "it is",
+    "we're": "we are",
+    "they're": "they are",
+    "can't": "cannot",
+    "won't": "will not",
+    "don't": "do not",
+    "didn't": "did not",
+    "isn't": "is not",
+    "aren't": "are not",
+    "wasn't": "was not",
+    "weren't": "were not",
+    "i've": "I have",
+    "you've": "you have",
+    "we've": "we have",
+    "they've": "they have",
+    "i'll": "I will",
+    "you'll": "you will",
+    "he'll": "he will",
+    "she'll": "she will",
+    "it'll": "it will",
+    "we'll": "we will",
+    "they'll": "they will",
+    "i'd": "I would",
+    "you'd": "you would",
+    "he'd": "he would",
+    "she'd": "she would",
+    "we'd": "we would",
+    "they'd": "they would",
+}
+
+
+def lowercase(text):
+    return text.lower()
+
+
+def collapse_whitespace(text, _whitespace=re.compile(r"\s+")):
+    return _whitespace.sub(" ", text).strip()
+
+
+class ContractionExpander:
+    """
+    Expand all contractions in a single pass with one compiled alternation.
+    """
+    def __init__(self, contractions=CONTRACTIONS):
+        self.contractions = {shortform.lower(): longform for shortform, longform in contractions.items()}
+        # Longest first, so no contraction can shadow a longer one sharing its prefix. Each has
+        # its own group: IGNORECASE also matches case variants like "İ'm" or "ſhe's", whose
+        # lower() is not a key of the table.
+        shortforms = sorted(self.contractions, key=len, reverse=True)
+        self._longforms = [self.contractions[shortform] for shortform in shortforms]
+        alternatives = "|".join(f"({re.escape(shortform)})" for shortform in shortforms)
+        self._pattern = re.compile(rf"\b(?:{alternatives})\b", re.IGNORECASE)
+        # Characters every contraction contains (the apostrophe), tokens without them are skipped
+        self._markers = set.intersection(*map(set, self.contractions)) if self.contractions else set()
+
+    def _replace(self, match):
+        return self._longforms[match.lastindex - 1]
+
+    def __call__(self, text):
+        return self._pattern.sub(self._replace, text)
+
+    def normalize_token(self, token):
+        """
+        Expand the contractions of one token, the same as __call__ on the whole text would.
+
+        A contraction never contains whitespace or a sentence terminator, so it never
+        crosses a token, and a token edge is a word boundary just like its neighbours are.
+        """
+        if self._markers and not self._markers.intersection(token):
+            return token
+        return self(token)
+
+
+class Normalizer:
+    """
+    Text normalization pipeline, built once and applied to every turn.
+
+    Stages are plain callables taking and returning a string and run in the given order,
+    e.g. Normalizer([ContractionExpander(), lowercase, collapse_whitespace]). All of them
+    only change text within a token, so they can run on the whole text or token by token
+    (see tokenizer.py); a stage with a faster way for single tokens offers normalize_token().
+    """
+    def __init__(self, stages=None):
+        self.stages = list(stages) if stages is not None else [ContractionExpander()]
+
+    def __call__(self, text):
+        for stage in self.stages:
+            text = stage(text)
+        return text
+
+    def normalize_token(self, token):
+        """
+        Normalize a single token (a run of characters without whitespace or terminators).
+        """
+        for stage in self.stages:
+            token = getattr(stage, "normalize_token", stage)(token)
+        return token
@@ -0,0 +1,101 @@
+import os
+import re
+import sys
+import threading
+from collections import Counter
+
+# rule_bundles.py is shared with the witness bot, it lives in shared/ next to the bot directories
+SHARED_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shared")
+if SHARED_DIR not in sys.path:
+    sys.path.insert(0, SHARED_DIR)
+
+import rule_bundles
+from matcher import PatternMatcher
+from rule_bundles import RuleRegistry
+from templates import TemplateRegistry
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__")
+
+# Bump when the layout of PalRules changes, older cache files are then ignored
+CACHE_VERSION = 4
+
+
+def _responses(section, responses):
+    if not responses or not all(isinstance(response, str) for response in responses):
+        raise ValueError(f"{section} needs a non-empty list of responses")
+    return tuple(responses)
+
+
+class PalRules:
+    """
+    The compiled rule bundle of the Pal bots.
+
+    Validates a parsed bundle (see rules.json) and builds everything a turn needs: the
+    keyword matcher of simple.py, the template ladder and the introduction dialogue of
+    sophisticated.py. A rule set is never modified once built, only its hit counters,
+    which count() updates under a lock.
+    """
+    def __init__(self, bundle):
+        self.digest = None  # SHA-256 of the bundle source, set by load_rules()
+        self.generation = 0  # Set when the rules are installed as the process-wide rules
+        self.hits = Counter()  # Keyword pattern (or "fallback") -> turns answered by it
+        self._lock = threading.Lock()  # Bots in other threads share the process-wide rules
+        keywords = bundle["keywords"]
+        self.keyword_matcher = PatternMatcher([rule["pattern"] for rule in keywords], re.IGNORECASE)
+        self.keyword_responses = [_responses(f"Keyword {rule['pattern']!r}", rule["responses"]) for rule in keywords]
+        self.fallback_responses = _responses("fallback_responses", bundle["fallback_responses"])
+        self.templates = TemplateRegistry(bundle["templates"])
+
+        introduction = bundle["introduction"]
+        self.introduction_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in introduction["patterns"]]
+        self.introduction_retry = _responses("introduction.retry", introduction["retry"])
+        self.confirm_retry = _responses("introduction.confirm_retry", introduction["confirm_retry"])
+        self.skip_introduction = _responses("introduction.skip", introduction["skip"])
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]  # Locks cannot be pickled
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def count(self, rule):
+        """
+        Count one turn answered by a rule.
+        """
+        with self._lock:
+            self.hits[rule] += 1
+
+    def snapshot(self):
+        """
+        Return the generation and its hit counters as a plain dict.
+        """
+        with self._lock:
+            hits = dict(self.hits)
+        return {"generation": self.generation, "digest": self.digest, "hits": hits}
+
+
+def load_rules(path=RULES_PATH, cache_dir=CACHE_DIR):
+    """
+    Load a rule bundle, from the precompiled cache if the bundle did not change.
+
+    :param cache_dir: Directory of the cache files or None to always compile.
+    """
+    return rule_bundles.load_bundle(path, cache_dir, PalRules, f"pal-rules-{CACHE_VERSION}")
+
+
+# The process-wide rules shared by all bots, the bundled ones unless others were installed
+_registry = RuleRegistry(load_rules)
+default_rules = _registry.default
+install_rules = _registry.install
+
+
+class RuleReloader(rule_bundles.RuleReloader):
+    """
+    Watch a Pal rule bundle and hot swap the process-wide rules when it changes.
+    """
+    def __init__(self, path=RULES_PATH, interval=1.0, cache_dir=CACHE_DIR, history=5):
+        super().__init__(_registry, load_rules, path, interval, cache_dir, history)
@@ -0,0 +1,165 @@
+import argparse
+import asyncio
+import itertools
+import os
+import time
+
+from english_dict import EnglishDictionary
+from pal_metrics import METRICS
+from pal_rules import RULES_PATH, RuleReloader
+from sophisticated import PalChatbot
+
+
+class Session:
+    """
+    One connected user: the bot holding the conversation state plus bookkeeping.
+    """
+    __slots__ = ("id", "bot", "turns", "last_active")
+
+    def __init__(self, session_id, bot):
+        self.id = session_id
+        self.bot = bot
+        self.turns = 0
+        self.last_active = time.monotonic()
+
+
+class PalServer:
+    """
+    Serve many PalChatbot conversations from a single asyncio event loop.
+
+    Line protocol (UTF-8): the client sends one line per turn, the server answers with
+    exactly one line. The connection closes when the user types 'exit', when the session
+    is idle for longer than idle_timeout, or when the server is full.
+    """
+    def __init__(self, max_sessions=10000, idle_timeout=300.0, max_line_length=4096, dictionary=None):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_line_length = max_line_length
+        # All sessions share one lexicon, only the conversation state is per session
+        self.dictionary = dictionary or EnglishDictionary()
+
+        self.sessions = {}
+        self._session_ids = itertools.count(1)
+        self.stats = {"sessions_started": 0, "sessions_rejected": 0, "sessions_evicted": 0, "turns": 0}
+
+    async def _send(self, writer, line):
+        writer.write(line.replace("\n", " ").encode("utf-8") + b"\n")
+        # Backpressure: stop reading from this client until it has consumed our replies
+        await writer.drain()
+
+    async def _read_line(self, reader):
+        """
+        Read the next line, or discard a line longer than the reader's limit up to its newline.
+
+        :return: The line, None for a discarded line, or b"" once the client disconnected.
+        """
+        overlong = False
+        while True:
+            try:
+                line = await reader.readuntil(b"\n")
+            except asyncio.IncompleteReadError as error:
+                return b"" if overlong else error.partial  # The last line may lack its newline
+            except asyncio.LimitOverrunError as error:
+                await reader.readexactly(error.consumed)  # Drop what is buffered, the line goes on
+                overlong = True
+                continue
+            return None if overlong else line
+
+    async def handle_client(self, reader, writer):
+        if len(self.sessions) >= self.max_sessions:
+            self.stats["sessions_rejected"] += 1
+            await self._send(writer, "Pal is talking to too many people right now, please try again later.")
+            writer.close()
+            return
+
+        session = Session(next(self._session_ids), PalChatbot(dictionary=self.dictionary))
+        self.sessions[session.id] = session
+        self.stats["sessions_started"] += 1
+        try:
+            await self._send(writer, session.bot.start())
+            while session.bot.running:
+                try:
+                    line = await asyncio.wait_for(self._read_line(reader), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    self.stats["sessions_evicted"] += 1
+                    await self._send(writer, "You've been quiet for a while, so I'll end our conversation here. Take care!")
+                    break
+                if line is None:
+                    await self._send(writer, "That was a bit too long for me, could you say it in fewer words?")
+                    continue
+                if not line:
+                    break  # Client disconnected
+
+                session.turns += 1
+                session.last_active = time.monotonic()
+                self.stats["turns"] += 1
+                reply = session.bot.respond(line.decode("utf-8", errors="replace"))
+                if reply is not None:
+                    await self._send(writer, reply)
+        except ConnectionError:
+            pass
+        finally:
+            del self.sessions[session.id]
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        """
+        Start listening on a Unix socket if a path is given, otherwise on TCP.
+        """
+        # The reader limit doubles as the maximum accepted line length
+        options = {"limit": self.max_line_length, "backlog": min(self.max_sessions, 4096)}
+        if path:
+            return await asyncio.start_unix_server(self.handle_client, path=path, **options)
+        return await asyncio.start_server(self.handle_client, host=host, port=port, **options)
+
+
+async def export_metrics(path, interval):
+    """
+    Write the metrics in the Prometheus text format every interval seconds (textfile collector style).
+    """
+    while True:
+        await asyncio.sleep(interval)
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(METRICS.to_prometheus())
+        os.replace(temporary, path)  # Scrapers never read a partial file
+
+
+async def main(args):
+    exporter = None
+    if args.metrics:
+        METRICS.enable()
+        exporter = asyncio.create_task(export_metrics(args.metrics, args.metrics_interval))
+    if args.reload:
+        # Sessions follow the process-wide rules, so a changed bundle applies to their next turn
+        RuleReloader(args.rules, interval=args.reload).start()
+    try:
+        pal_server = PalServer(max_sessions=args.max_sessions, idle_timeout=args.idle_timeout)
+        server = await pal_server.start(host=args.host, port=args.port, path=args.unix)
+        print(f"Pal is listening on {args.unix or f'{args.host}:{args.port}'}", flush=True)
+        async with server:
+            await server.serve_forever()
+    finally:
+        if exporter:
+            exporter.cancel()
+            try:
+                await exporter
+            except asyncio.CancelledError:
+                pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Pal conversations over a line-based socket protocol.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--max-sessions", type=int, default=10000)
+    parser.add_argument("--idle-timeout", type=float, default=300.0, help="seconds before an idle session is closed")
+    parser.add_argument("--rules", default=RULES_PATH, help="rule bundle to watch with --reload")
+    parser.add_argument("--reload", type=float, metavar="SECONDS", help="check the rule bundle for changes every SECONDS")
+    parser.add_argument("--metrics", metavar="PATH", help="record per-stage latencies and write them to PATH in Prometheus format")
+    parser.add_argument("--metrics-interval", type=float, default=10.0, help="seconds between metrics exports")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
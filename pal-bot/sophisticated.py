@@ -1,13 +1,43 @@
-import re
 import random
 from english_dict import EnglishDictionary, Category
+from normalizer import Normalizer
+from pal_metrics import METRICS
+from pal_rules import default_rules
+from tokenizer import sentence_spans, sentence_words
+from turn_cache import DEFAULT_CACHE, MISSING
 import time
 
+# Conversation stages, respond() dispatches on them
+INTRODUCE = "introduce"
+CONFIRM_NAME = "confirm_name"
+CHAT = "chat"
+
 class PalChatbot:
-    def __init__(self):
+    # Only the conversation state is per bot, rules, dictionary and normalizer are shared
+    __slots__ = ("running", "debug", "rng", "dictionary", "_rules", "cache",
+                 "stage", "name", "introduction_attempts", "max_introduction_attempts")
+
+    normalizer = Normalizer()  # Contraction patterns are compiled once per process
+
+    def __init__(self, dictionary=None, max_introduction_attempts=2, rng=None, rules=None, cache=None):
         self.running = True
         self.debug = False 
-        self.dictionary = EnglishDictionary()  # Initialize EnglishDictionary
+        self.rng = rng or random  # Pass a random.Random for reproducible replies
+        self.dictionary = dictionary or EnglishDictionary()  # Initialize EnglishDictionary
+        # Fixed rules, or None to follow the process-wide (hot reloadable) rules of rules.json
+        self._rules = rules
+        # Memoized sentences and components, shared by all bots of the process unless one is given
+        self.cache = cache if cache is not None else DEFAULT_CACHE
+
+        # Conversation state, advanced by respond()
+        self.stage = INTRODUCE
+        self.name = None
+        self.introduction_attempts = 0
+        self.max_introduction_attempts = max_introduction_attempts
+
+    @property
+    def rules(self):
+        return self._rules or default_rules()
 
     def say(self, text):
         """
@@ -15,23 +45,20 @@ class PalChatbot:
         """
         print(f"Pal: {text}")
 
-    def ask(self, prompt=""):
+    def extract_subject_verb_object(self, sentence):
         """
-        Print the text to the console and return user input.
+        Extract subject, verb, object, and adjective from a sentence using the EnglishDictionary.
         """
-        self.say(prompt)
-        
-        user_input = input("You: ").strip() 
-        if user_input.lower() == "exit":
-            self.running = False
-        
-        return user_input 
+        return self.extract_components(sentence.lower().split())  # Convert to lower for case-insensitive matching
 
-    def extract_subject_verb_object(self, sentence):
+    def extract_components(self, words):
         """
-        Extract subject, verb, object, and adjective from a sentence using the EnglishDictionary.
+        Extract subject, verb, object, and adjective from the lowercased words of a sentence.
         """
-        words = sentence.lower().split()  # Convert to lower for case-insensitive matching
+        # Classify every token once, the checks below only test bits of its category mask
+        masks = [self.dictionary.categorize(word) for word in words]
+        SUBJECT, VERB = Category.SUBJECTS.bit, Category.VERBS.bit
+        OBJECT, ADJECTIVE = Category.OBJECTS.bit, Category.ADJECTIVES.bit
         subject, verb, obj, adj = None, None, None, None
         found_subject = False
         found_verb = False
@@ -39,29 +66,30 @@ class PalChatbot:
         i = 0
         while i < len(words):
             word = words[i]
+            mask = masks[i]
             # Check for "the" + known object pattern first
-            if word == "the" and i + 1 < len(words) and words[i+1] in self.dictionary.lookup(Category.OBJECTS) and not found_subject:
+            if word == "the" and i + 1 < len(words) and masks[i+1] & OBJECT and not found_subject:
                 subject = f"the {words[i+1]}"
                 found_subject = True
                 i += 1  # Skip the next word as it's part of the subject
-            elif word in self.dictionary.lookup(Category.SUBJECTS) and not found_subject:
+            elif mask & SUBJECT and not found_subject:
                 subject = word
                 found_subject = True
-            elif word in self.dictionary.lookup(Category.VERBS) and found_subject and not found_verb:  # Verb usually follows subject
+            elif mask & VERB and found_subject and not found_verb:  # Verb usually follows subject
                 verb = word
                 found_verb = True
-            elif word in self.dictionary.lookup(Category.OBJECTS) and found_verb and not found_obj and (subject is None or word != subject.split()[-1]):
+            elif mask & OBJECT and found_verb and not found_obj and (subject is None or word != subject.split()[-1]):
                 obj = word
                 found_obj = True
-            elif word in self.dictionary.lookup(Category.ADJECTIVES) and not adj:  # Adjective can appear anywhere
+            elif mask & ADJECTIVE and not adj:  # Adjective can appear anywhere
                 adj = word
             i += 1
 
         # Fallback if strict order fails but components exist (excluding "the" check here)
-        if not subject: subject = next((w for w in words if w in self.dictionary.lookup(Category.SUBJECTS)), None)
-        if not verb: verb = next((w for w in words if w in self.dictionary.lookup(Category.VERBS)), None)
-        if not obj: obj = next((w for w in words if w in self.dictionary.lookup(Category.OBJECTS) and (subject is None or w != subject.split()[-1])), None)
-        if not adj: adj = next((w for w in words if w in self.dictionary.lookup(Category.ADJECTIVES)), None)
+        if not subject: subject = next((w for w, m in zip(words, masks) if m & SUBJECT), None)
+        if not verb: verb = next((w for w, m in zip(words, masks) if m & VERB), None)
+        if not obj: obj = next((w for w, m in zip(words, masks) if m & OBJECT and (subject is None or w != subject.split()[-1])), None)
+        if not adj: adj = next((w for w, m in zip(words, masks) if m & ADJECTIVE), None)
 
         # Debug output
         if self.debug:
@@ -69,224 +97,175 @@ class PalChatbot:
 
         return subject, verb, obj, adj
 
-    def craft_dynamic_response(self, text, subject, verb, obj, adj):
+    def craft_dynamic_response(self, text, subject, verb, obj, adj, rules=None):
         """
         Create a dynamic response using extracted components with more variety.
+        Returns None if no specific component combination matched well.
         """
-        # Enhanced logic based on extracted components with multiple response options
-        response_templates = []
-
-        if adj and subject and verb and obj:
-            response_templates = [
-                f"It sounds like you're feeling {adj} regarding {subject} {verb} {obj}. Could you elaborate?",
-                f"Feeling {adj} when {subject} {verb} {obj} seems significant. What's behind that?",
-                f"Why do you associate feeling {adj} with {subject} {verb} {obj}?",
-            ]
-        elif adj and subject and verb: # e.g., "I am happy because..." (verb might be 'am')
-             response_templates = [
-                 f"Why do you feel {adj} when you say '{subject} {verb}'?",
-                 f"What leads you to feel {adj} in that situation ({subject} {verb})?",
-                 f"Tell me more about feeling {adj} when {subject} {verb}.",
-             ]
-        elif subject and verb and obj:
-            response_templates = [
-                f"Why do you think {subject} {verb} {obj}?",
-                f"What comes to mind when you say '{subject} {verb} {obj}'?",
-                f"Tell me more about {subject} {verb} {obj}.",
-                f"How does '{subject} {verb} {obj}' make you feel?",
-            ]
-        elif adj and subject: # Handle cases like "I am sad", "I feel lonely"
-             response_templates = [
-                 f"Why do you feel {adj}?",
-                 f"What makes you say you are {adj}?",
-                 f"Tell me more about feeling {adj}.",
-                 f"When did you start feeling {adj}?",
-             ]
-        elif subject and verb:
-             response_templates = [
-                 f"Can you elaborate on '{subject} {verb}'?",
-                 f"What does '{subject} {verb}' mean to you?",
-                 f"Tell me more about why {subject} {verb}.",
-             ]
-        elif verb and obj:
-             response_templates = [
-                 f"What makes '{verb} {obj}' significant to you?",
-                 f"How do you feel about '{verb} {obj}'?",
-                 f"Tell me more about '{verb} {obj}'.",
-             ]
-        elif adj: # Only adjective detected
-             response_templates = [
-                 f"Tell me more about feeling {adj}.",
-                 f"You mentioned feeling {adj}. Can you expand on that?",
-                 f"What's causing you to feel {adj}?",
-             ]
-        elif obj: # Only object detected (less common, but possible)
-            response_templates = [
-                f"You mentioned {obj}. How does that relate to how you're feeling?",
-                f"What about {obj} is on your mind?",
-                f"Tell me more concerning {obj}.",
-            ]
-
-        if response_templates:
-            return random.choice(response_templates)
-
-        # If no specific component combination matched well, return None
-        return None
+        return (rules or self.rules).templates.render(subject, verb, obj, adj, rng=self.rng)
 
     def normalize_text(self, text):
         """
         Normalize text by replacing shortforms with their long forms.
+        Turns normalize token by token instead, see sentences().
+        """
+        return self.normalizer(text)
+
+    def sentences(self, text):
         """
-        contractions = {
-            "i'm": "I am",
-            "you're": "you are",
-            "he's": "he is",
-            "she's": "she is",
-            "it's": "it is",
-            "we're": "we are",
-            "they're": "they are",
-            "can't": "cannot",
-            "won't": "will not",
-            "don't": "do not",
-            "didn't": "did not",
-            "isn't": "is not",
-            "aren't": "are not",
-            "wasn't": "was not",
-            "weren't": "were not",
-            "i've": "I have",
-            "you've": "you have",
-            "we've": "we have",
-            "they've": "they have",
-            "i'll": "I will",
-            "you'll": "you will",
-            "he'll": "he will",
-            "she'll": "she will",
-            "it'll": "it will",
-            "we'll": "we will",
-            "they'll": "they will",
-            "i'd": "I would",
-            "you'd": "you would",
-            "he'd": "he would",
-            "she'd": "she would",
-            "we'd": "we would",
-            "they'd": "they would",
-        }
-        for shortform, longform in contractions.items():
-            text = re.sub(rf"\b{shortform}\b", longform, text, flags=re.IGNORECASE)
-        
-        return text
-
-    def analyze_and_respond(self, text):
-        # Normalize the input text
-        text = self.normalize_text(text)
-
-        # Split input into sentences and process the first meaningful one for dynamic response
-        sentences = [s for s in re.split(r'[.!?]+\s*', text) if s.strip()]
-        processed_dynamically = False
-        
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
+        Yield the normalized, lowercased words of each sentence of the text.
+
+        The text is tokenized in one pass and segmented lazily, so a caller that stops
+        at the first sentence never tokenizes the rest. The sentences segmented so far
+        are memoized per input together with the offset to resume from.
+        """
+        cached = self.cache.sentences.get(text)
+        done, offset = ((), 0) if cached is MISSING else cached
+        yield from done
+        if offset is None:
+            return
+
+        sentences = list(done)
+        try:
+            for spans, offset in sentence_spans(text, offset):
+                words = sentence_words(text, spans, self.normalizer)
+                sentences.append(words)
+                yield words
+            offset = None  # Segmented to the end
+        finally:  # Also when the caller stopped early, the next lookup resumes at offset
+            self.cache.sentences.put(text, (tuple(sentences), offset))
+
+    def components(self, words):
+        """
+        Extract subject, verb, object and adjective of a sentence's words, memoized per lexicon version.
+        """
+        if self.debug:
+            return self.extract_components(words)  # Prints what it detects
+        key = (self.dictionary.version, words)
+        components = self.cache.components.get(key)
+        if components is MISSING:
+            components = self.extract_components(words)
+            self.cache.components.put(key, components)
+        return components
+
+    def analyze_and_respond(self, text, rules=None):
+        """
+        Craft a dynamic response for the first sentence that yields one.
+
+        :return: The response or None, if a fallback response is needed.
+        """
+        rules = rules or self.rules  # One rule set for the whole lookup, even if a reload swaps it meanwhile
+        # Per-stage timers, free unless METRICS is enabled
+        start = METRICS.clock()
+
+        # Tokenize and normalize the input sentence by sentence, stopping at the first meaningful one for dynamic response
+        for words in self.sentences(text):
+            start = METRICS.lap("normalize", start)
 
             # Extract components from the sentence
-            subject, verb, obj, adj = self.extract_subject_verb_object(sentence)
+            subject, verb, obj, adj = self.components(words)
+            start = METRICS.lap("extract", start)
 
             # Try crafting a dynamic response (component-based)
-            dynamic_response = self.craft_dynamic_response(sentence, subject, verb, obj, adj)
+            dynamic_response = self.craft_dynamic_response(" ".join(words), subject, verb, obj, adj, rules)
+            start = METRICS.lap("craft", start)
 
             if dynamic_response:
-                self.ask(dynamic_response)
-                processed_dynamically = True
-                break # Respond based on the first sentence that yields a dynamic response
+                return dynamic_response # Respond based on the first sentence that yields a dynamic response
 
-        if processed_dynamically:
-            return True
+        METRICS.lap("normalize", start)  # Segmenting the rest found no further sentence
+        return None # Signal that no specific response was found, fallback needed
 
-        # If no dynamic response was generated, check keyword patterns
-        return False # Signal that no specific response was found, fallback needed
+    def start(self):
+        """
+        Start the conversation and return Pal's opening line.
+        """
+        return "Hello! I'm Pal. What's your name?"
 
-    def introduce(self, max_introduction_attempts=2):
+    def respond(self, text):
         """
-        Introduce the chatbot and ask for the user's name.
+        Process one user turn without any console I/O.
+
+        :param text: The user's input.
+        :return: Pal's reply or None if the user ended the conversation.
         """
-        name = None
-        introduction_attempts = 0
-
-        intoduction_patterns = [
-            r"i am (\w+)",
-            r"you can call me (\w+)",
-            r"my name is (\w+)",
-            r"it is (\w+)",
-            r"this is (\w+)",
-            r"i am called (\w+)",
-            r"they call me (\w+)",
-            r"^(\w+)$",
-        ]
-
-        user_response = self.ask("Hello! I'm Pal. What's your name?")
-        while not name:
-            introduction_attempts += 1
-
-            for pattern in intoduction_patterns:
-                match = re.search(pattern, user_response, re.IGNORECASE)
-                if match:
-                    name = match.group(1)
-                    break
-
-            if not name:
-                user_response = self.ask(random.choice([
-                    "Sorry, I couldn't catch your name. Could you please say it again?",
-                    "Hmm, I missed that. What's your name again?",
-                    "Oh, I didn't quite get that. Could you tell me your name once more?",
-                    "My apologies, I didn't catch your name. Could you repeat it for me?"
-                ]))
-                print(f"DEBUG: User response: {user_response}")
-                continue
-
-            confirmation = self.ask(f"Did I get that right? Your name is {name}, correct?").lower()
-            if confirmation not in ["yes", "y", "right", "correct", "true", "yeah"]:
-                name = None
-                if introduction_attempts > max_introduction_attempts:
-                    return None
-                user_response = self.ask(random.choice([
-                    "Oh, I see. then tell me your name again, please.",
-                    "Alright, then please repeat your name.",
-                    "Upsi, then please share your name once more.",
-                    "My apologies, I seem to have missed your name. Please say it again.",
-                    "Oh, I see. then tell me your name again, please.",
-                ]))
-
-        return name
+        text = text.strip()
+        if text.lower() == "exit":
+            self.running = False
+            return None
+
+        rules = self.rules  # One rule set for the whole turn, even if a reload swaps it meanwhile
+        start = METRICS.clock()
+        if self.stage == INTRODUCE:
+            reply = self._introduce(text, rules)
+        elif self.stage == CONFIRM_NAME:
+            reply = self._confirm_name(text, rules)
+        else:
+            reply = self.analyze_and_respond(text, rules) or self._fallback(rules)
+        METRICS.lap("turn", start)
+        return reply
 
-    def run(self):
-        fallback_responses = [
-            "Tell me more.",
-            "I see, please continue.",
-            "That's interesting, can you elaborate?",
-            "Good, please go on.",
-        ]
+    def _fallback(self, rules):
+        """
+        Pick a fallback response and count it for the generation of the turn's rules.
+        """
+        rules.count("fallback")
+        return self.rng.choice(rules.fallback_responses)
 
-        name = self.introduce(max_introduction_attempts=2)
+    def _introduce(self, text, rules):
+        """
+        Try to recognize the user's name in their answer.
+        """
+        self.introduction_attempts += 1
+
+        for pattern in rules.introduction_patterns:
+            if METRICS.enabled:
+                start = METRICS.clock()
+                match = pattern.search(text)
+                METRICS.rule(pattern.pattern, match is not None, METRICS.clock() - start)
+            else:
+                match = pattern.search(text)
+            if match:
+                self.name = match.group(1)
+                self.stage = CONFIRM_NAME
+                return f"Did I get that right? Your name is {self.name}, correct?"
+
+        return self.rng.choice(rules.introduction_retry)
+
+    def _confirm_name(self, text, rules):
+        """
+        Handle the user's answer to the name confirmation.
+        """
+        if text.lower() in ["yes", "y", "right", "correct", "true", "yeah"]:
+            return self._start_chat(rules)
+
+        self.name = None
+        if self.introduction_attempts > self.max_introduction_attempts:
+            return self._start_chat(rules)
+
+        self.stage = INTRODUCE
+        return self.rng.choice(rules.confirm_retry)
 
-        if name:
-            self.say(f"Nice to meet you, {name}! Let's get started. If you want to exit, just type 'exit'.")
+    def _start_chat(self, rules):
+        """
+        Finish the introduction and open the conversation.
+        """
+        self.stage = CHAT
+        if self.name:
+            welcome = f"Nice to meet you, {self.name}! Let's get started. If you want to exit, just type 'exit'."
         else:
-            self.say(random.choice([
-                "Oh boy... You know what? Let's just scratch the introduction and continue with conversation. If you want to exit, just type 'exit'.",
-                "Oh no. :-( Let's just skip the formalities and dive into the conversation! If you want to exit, just type 'exit'.",
-                "My apologies, that I couldn't get your name yet again. But no worries, let's move on to the important part! For your information. If you want to exit, just type 'exit'.",
-            ]))
+            welcome = self.rng.choice(rules.skip_introduction)
+        return f"{welcome} So... how are you doing today? :-)"
 
-        user_input = self.ask("So... how are you doing today? :-)")
+    def run(self):
+        """
+        Console adapter around start() and respond().
+        """
+        self.say(self.start())
         while self.running:
-            if user_input.lower() == "exit":
-                self.running = False
-                continue
-
-            responded = self.analyze_and_respond(user_input)
-            if not responded:
-                self.ask(random.choice(fallback_responses))
+            reply = self.respond(input("You: "))
+            if reply is not None:
+                self.say(reply)
 
 if __name__ == "__main__":
     PalChatbot().run()
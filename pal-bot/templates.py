@@ -0,0 +1,66 @@
+import json
+import random
+from string import Formatter
+
+# Bits of the component signature, a set bit means the component was extracted
+COMPONENT_BITS = {"subject": 1, "verb": 2, "obj": 4, "adj": 8}
+
+def signature(subject, verb, obj, adj):
+    """
+    Encode which components were extracted as a 4-bit signature.
+    """
+    return (1 if subject else 0) | (2 if verb else 0) | (4 if obj else 0) | (8 if adj else 0)
+
+
+class TemplateRegistry:
+    """
+    Response templates resolved per component signature.
+
+    Rules are given in priority order, the first rule whose components are all present
+    wins (see the "templates" section of rules.json). All 16 signatures are resolved against the prioritized rules once, so a turn costs
+    one list index and formats only the template that was picked.
+    """
+    def __init__(self, rules):
+        self.rules = rules
+        self._table = [None] * (1 << len(COMPONENT_BITS))
+
+        for rule in rules:
+            required = 0
+            for component in rule["requires"]:
+                if component not in COMPONENT_BITS:
+                    raise ValueError(f"Unknown component {component!r} in template rule")
+                required |= COMPONENT_BITS[component]
+
+            formatters = []
+            for template in rule["templates"]:
+                fields = {field for _, field, _, _ in Formatter().parse(template) if field is not None}
+                if not fields <= set(rule["requires"]):
+                    raise ValueError(f"Template {template!r} uses components it does not require")
+                formatters.append(template.format)
+
+            for sig in range(len(self._table)):
+                if self._table[sig] is None and sig & required == required:
+                    self._table[sig] = tuple(formatters)
+
+    @classmethod
+    def from_json(cls, path):
+        """
+        Load template rules from a JSON file with the layout of the "templates" section of rules.json.
+        """
+        with open(path, encoding="utf-8") as file:
+            return cls(json.load(file))
+
+    def templates_for(self, subject, verb, obj, adj):
+        return self._table[signature(subject, verb, obj, adj)] or ()
+
+    def render(self, subject, verb, obj, adj, rng=random):
+        """
+        Pick one template matching the extracted components and format it.
+
+        :return: The response or None if no rule covers the components.
+        """
+        formatters = self._table[signature(subject, verb, obj, adj)]
+        if not formatters:
+            return None
+        return rng.choice(formatters)(subject=subject, verb=verb, obj=obj, adj=adj)
+
@@ -0,0 +1,51 @@
+import re
+
+# A word is a run of characters that are neither whitespace nor sentence terminators,
+# a run of terminators ends a sentence. Group 1 is only set for words.
+TOKEN = re.compile(r"([^\s.!?]+)|[.!?]+")
+
+
+def token_spans(text, start=0):
+    """
+    Yield the (start, end) offsets of the words of the text, in one pass and without copying them.
+    """
+    for match in TOKEN.finditer(text, start):
+        if match.lastindex:
+            yield match.span()
+
+
+def sentence_spans(text, start=0):
+    """
+    Segment the text into sentences lazily, stopping as soon as the caller stops iterating.
+
+    The sentences are those of re.split(r'[.!?]+\\s*', text) that are not blank.
+
+    :return: Generator of (word spans, end) per sentence, end is the offset to resume segmenting from.
+    """
+    spans = []
+    for match in TOKEN.finditer(text, start):
+        if match.lastindex:
+            spans.append(match.span())
+        elif spans:
+            yield spans, match.end()
+            spans = []
+    if spans:
+        yield spans, len(text)
+
+
+def sentence_words(text, spans, normalizer):
+    """
+    Copy the words of one sentence out of the text, normalized per token and lowercased.
+
+    A token may expand to several words ("I'm" -> "i", "am"), so the words are exactly
+    those of normalizer(sentence).lower().split().
+    """
+    words = []
+    for start, end in spans:
+        token = text[start:end]
+        normalized = normalizer.normalize_token(token)
+        if normalized == token:  # Most tokens, and they contain no whitespace
+            words.append(token.lower())
+        else:
+            words.extend(normalized.lower().split())
+    return tuple(words)
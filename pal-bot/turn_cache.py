@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by LRUCache.get() for keys that are not cached
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Bounded mapping that drops the least recently used entry when it is full.
+
+    Entries older than ttl seconds count as missing and are dropped when next looked up.
+    Safe to share between threads, every operation holds a lock for a few dict operations.
+    """
+    def __init__(self, max_size=10000, ttl=None, clock=time.monotonic):
+        """
+        :param max_size: Maximum number of entries, 0 disables the cache.
+        :param ttl: Seconds an entry stays valid or None to keep it until it is evicted.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (value, expiry time or None), least recently used first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        if not self.max_size:
+            return
+        expires = None if self.ttl is None else self.clock() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        """
+        Return the size and the counters as a plain dict.
+        """
+        lookups = self.hits + self.misses
+        return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0, "evictions": self.evictions,
+                "expirations": self.expirations}
+
+
+class TurnCache:
+    """
+    Memoized results of the deterministic steps of a sophisticated.py turn.
+
+    Chat input repeats a lot ("I'm sad", "yes"), so the sentences a raw input normalizes
+    and splits into are cached per input, and the (subject, verb, obj, adj) components
+    per sentence and lexicon version. A bot with another lexicon, or a
+    dictionary that was given a new one, therefore never sees components of the old
+    words. Templates are still picked per turn with the bot's own random generator.
+    """
+    def __init__(self, max_size=10000, ttl=None):
+        # raw input -> (word tuples of the sentences segmented so far, offset to resume from or None when done)
+        self.sentences = LRUCache(max_size, ttl)
+        self.components = LRUCache(max_size, ttl)  # (lexicon version, word tuple) -> (subject, verb, obj, adj)
+
+    def clear(self):
+        """
+        Drop every cached entry, e.g. after the contraction table was changed.
+        """
+        self.sentences.clear()
+        self.components.clear()
+
+    def snapshot(self):
+        return {"sentences": self.sentences.snapshot(), "components": self.components.snapshot()}
+
+
+# Shared by all bots of the process unless a bot is given its own
+DEFAULT_CACHE = TurnCache()
@@ -0,0 +1,22 @@
+import time
+
+def best_time(func, repeat=3):
+    """Best wall time of func() in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def time_per_input(func, inputs, repeat=3):
+    """Run func over all inputs `repeat` times and return the best time per input in microseconds"""
+    def run():
+        for text in inputs:
+            func(text)
+    return best_time(run, repeat) / len(inputs) * 1e6
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of values"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
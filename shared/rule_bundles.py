@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+from collections import deque
+
+def parse_bundle(source, path):
+    """Parse the source of a JSON bundle, or a YAML bundle if the file name says so"""
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("YAML rule bundles need the PyYAML package") from None
+        return yaml.safe_load(source)
+    return json.loads(source)
+
+def load_bundle(path, cache_dir, build, cache_name):
+    """
+    Load a rule bundle, from the precompiled cache if the bundle did not change.
+
+    build turns the parsed bundle into the bot's rule object, which gets the digest of
+    the source. The cache file is keyed by cache_name and the SHA-256 of the bundle's
+    content, so an edited bundle is parsed, validated and compiled once and every later
+    start just unpickles it. cache_dir=None always compiles.
+    """
+    with open(path, "rb") as file:
+        source = file.read()
+
+    digest = hashlib.sha256(source).hexdigest()
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"{cache_name}-{digest}.pickle")
+        try:
+            with open(cache_path, "rb") as file:
+                return pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            pass  # Missing, unreadable or stale cache file, it is rebuilt below
+
+    rules = build(parse_bundle(source.decode("utf-8"), path))
+    rules.digest = digest
+
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temporary = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as file:
+                pickle.dump(rules, file, pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, cache_path)  # Concurrent workers never see a partial file
+        except OSError:
+            pass  # A read-only install still works, it just compiles on every start
+    return rules
+
+class RuleRegistry:
+    """
+    The process-wide rules of one bot, shared by all its instances.
+
+    load is called without arguments to load the bundled rules on first use. Rule objects
+    need a writable `generation` and a `digest` attribute.
+    """
+
+    def __init__(self, load):
+        self.load = load
+        self.rules = None
+        self.generations = 0
+
+    def default(self):
+        """The process-wide rules, the bundled ones unless others were installed"""
+        if self.rules is None:
+            self.install(self.load())
+        return self.rules
+
+    def install(self, rules):
+        """
+        Make rules the process-wide rules with a single assignment. Turns that already hold
+        the previous rules finish with them, later turns use the new ones.
+        """
+        self.generations += 1
+        rules.generation = self.generations
+        self.rules = rules
+        return rules
+
+class RuleReloader:
+    """
+    Watch a rule bundle and hot swap the process-wide rules of a registry when it changes.
+
+    A daemon thread polls the bundle's modification time and compiles a changed bundle
+    itself with load(path, cache_dir), the request path never waits for a compile. A
+    bundle that fails to load is reported and the running rules stay in place. The last
+    `history` generations are kept so their hit counters can be compared.
+    """
+
+    def __init__(self, registry, load, path, interval=1.0, cache_dir=None, history=5):
+        self.registry = registry
+        self.load = load
+        self.path = path
+        self.interval = interval
+        self.cache_dir = cache_dir
+        self.generations = deque(maxlen=history)
+        self.error = None
+        self._mtime = None
+        self._stopped = threading.Event()
+        self._thread = None
+        if not self.check():  # Install the watched bundle unless the running rules are the same
+            self.generations.append(registry.default())
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def check(self):
+        """Reload the bundle if it changed on disk, returns True if new rules were installed"""
+        mtime = self._stat()
+        if mtime is None or mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        current = self.registry.default()
+        try:
+            rules = self.load(self.path, self.cache_dir)
+        except Exception as error:  # Any broken bundle must leave the running rules alone
+            self.error = error
+            print(f"Keeping rule generation {current.generation}, {self.path} failed to load: {error!r}", file=sys.stderr)
+            return False
+        self.error = None
+        if rules.digest == current.digest:
+            return False  # Touched but not changed
+        self.generations.append(self.registry.install(rules))
+        return True
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._watch, name="rule-reloader", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+
+    def snapshot(self):
+        """Hit counters of the kept generations, oldest first"""
+        return [rules.snapshot() for rules in self.generations]
@@ -0,0 +1,135 @@
+import bisect
+import json
+import threading
+import time
+
+# Upper bounds of the latency histogram buckets in seconds
+BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+class Histogram:
+    """Latency histogram of one pipeline stage"""
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # The last bucket takes everything above BUCKETS[-1]
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def snapshot(self):
+        return {"count": self.count, "seconds": self.total, "buckets": dict(zip(map(str, BUCKETS + ("+Inf",)), self.counts))}
+
+class Metrics:
+    """
+    Per-stage timers and per-rule counters of a bot's turn pipeline.
+
+    Every bot has one process-wide instance, pal_metrics.METRICS and witness_metrics.METRICS.
+
+    Disabled, a stage costs two method calls that return at once, so the instrumentation
+    can stay in production code:
+
+        start = METRICS.clock()
+        self._extract_facts(statement, timestamp)
+        start = METRICS.lap("facts", start)
+
+    Hooks are called with (stage, seconds) for every observation, e.g. to log slow turns
+    or to feed a profiler. Updates are serialized by a lock, so threaded servers can share
+    an instance, and exports are rendered from a consistent copy.
+    """
+    def __init__(self, enabled=False, prefix="bot"):
+        self.enabled = enabled
+        self.prefix = prefix  # Metric name prefix of the Prometheus output
+        self.stages = {}  # stage -> Histogram
+        self.rules = {}  # rule -> [attempts, matches, seconds]
+        self.hooks = []
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.rules = {}
+
+    def clock(self):
+        """Start timing a stage, returns 0 when disabled"""
+        return time.perf_counter() if self.enabled else 0.0
+
+    def lap(self, stage, start):
+        """Record the time since start for a stage and return the current clock for the next stage"""
+        if not self.enabled:
+            return 0.0
+        now = time.perf_counter()
+        self.observe(stage, now - start)
+        return now
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+        for hook in self.hooks:
+            hook(stage, seconds)
+
+    def rule(self, rule, matched, seconds):
+        """Count one attempt of a rule, whether it matched and what it cost"""
+        with self._lock:
+            counters = self.rules.get(rule)
+            if counters is None:
+                counters = self.rules[rule] = [0, 0, 0.0]
+            counters[0] += 1
+            counters[1] += matched
+            counters[2] += seconds
+
+    def _copy(self):
+        """Copies of the histograms and rule counters, taken under the lock"""
+        with self._lock:
+            stages = {}
+            for stage, histogram in self.stages.items():
+                copy = stages[stage] = Histogram()
+                copy.counts, copy.count, copy.total = list(histogram.counts), histogram.count, histogram.total
+            return stages, {rule: list(counters) for rule, counters in self.rules.items()}
+
+    def snapshot(self):
+        """Return all timers and counters as a plain dict"""
+        stages, rules = self._copy()
+        return {
+            "stages": {stage: histogram.snapshot() for stage, histogram in stages.items()},
+            "rules": {rule: {"attempts": attempts, "matches": matches, "seconds": seconds}
+                      for rule, (attempts, matches, seconds) in rules.items()},
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False)
+
+    def to_prometheus(self, prefix=None):
+        """Render the snapshot in the Prometheus text exposition format"""
+        prefix = prefix or self.prefix
+        stages, rules = self._copy()
+        lines = [f"# TYPE {prefix}_stage_seconds histogram"]
+        for stage, histogram in stages.items():
+            label = f'stage="{_escape(stage)}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), histogram.counts):
+                cumulative += count
+                lines.append(f'{prefix}_stage_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"{prefix}_stage_seconds_sum{{{label}}} {histogram.total}")
+            lines.append(f"{prefix}_stage_seconds_count{{{label}}} {histogram.count}")
+
+        for name, index in (("attempts", 0), ("matches", 1), ("seconds", 2)):
+            lines.append(f"# TYPE {prefix}_rule_{name}_total counter")
+            for rule, counters in rules.items():
+                lines.append(f'{prefix}_rule_{name}_total{{rule="{_escape(rule)}"}} {counters[index]}')
+        return "\n".join(lines) + "\n"
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
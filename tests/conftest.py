@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The bots are flat script directories, make their modules importable from the tests
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for directory in ("pal-bot", "witness_bot", "shared", "tools"):
+    path = os.path.join(ROOT, directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,26 @@
+from context_manager import ContextManager
+from duplicates import NearDuplicateIndex
+
+def test_filler_only_statement_repeats_exactly():
+    context = ContextManager()
+    context.add_user_statement("I was there")
+    context.add_user_statement("The car was red")
+    assert context.find_repeat("I was there.") is not None
+    context.add_user_statement("i was THERE")
+    assert context.find_repeat("i was THERE").turn == 1
+    assert context.find_repeat("I was here") is None
+
+def test_short_statements_never_repeat():
+    index = NearDuplicateIndex()
+    assert index.check_and_add("no idea", 1) is None
+    assert index.check_and_add("no idea", 2) is None
+
+def test_filler_only_statements_are_evicted():
+    index = NearDuplicateIndex(capacity=2)
+    index.check_and_add("I was there", 1)
+    index.check_and_add("The car was red", 2)
+    assert index.check_and_add("I was there", 3) is not None
+    index.check_and_add("The man ran away", 4)
+    index.check_and_add("The dog barked loudly", 5)
+    assert index.query("I was there") is None
+    assert len(index) == 2
@@ -0,0 +1,24 @@
+import random
+
+import pytest
+
+import sophisticated
+from normalizer import Normalizer
+from tokenizer import sentence_spans, sentence_words
+
+# re.IGNORECASE matches these case variants of "she's" and "i'm", their lower() is no contraction
+CASE_VARIANTS = [("ſhe's sad", "she is sad"), ("İ'm sad", "I am sad"), ("ı'm sad", "I am sad"), ("I'M SAD", "I am SAD")]
+
+@pytest.mark.parametrize("text, expanded", CASE_VARIANTS)
+def test_case_variants_expand(text, expanded):
+    normalizer = Normalizer()
+    assert normalizer(text) == expanded
+    assert " ".join(normalizer.normalize_token(token) for token in text.split()) == expanded
+    words = [sentence_words(text, spans, normalizer) for spans, _ in sentence_spans(text)]
+    assert words == [tuple(expanded.lower().split())]
+
+@pytest.mark.parametrize("text, _", CASE_VARIANTS)
+def test_case_variants_answered(text, _):
+    bot = sophisticated.PalChatbot(rng=random.Random(1))
+    bot.stage = sophisticated.CHAT
+    assert bot.respond(text)
@@ -0,0 +1,29 @@
+import asyncio
+
+from server import PalServer
+
+TOO_LONG = "That was a bit too long for me, could you say it in fewer words?"
+
+async def _converse(chunks, max_line_length=64):
+    pal_server = PalServer(max_line_length=max_line_length)
+    server = await pal_server.start(port=0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for chunk in chunks:
+        writer.write(chunk.encode("utf-8"))
+        await writer.drain()
+        await asyncio.sleep(0.05)  # Every chunk arrives in a read of its own
+    replies = (await asyncio.wait_for(reader.read(), 10)).decode("utf-8").splitlines()
+    writer.close()
+    server.close()
+    await server.wait_closed()
+    return replies
+
+def test_overlong_line_is_discarded_whole():
+    # The end of the line only arrives after the limit was hit, it must not become a turn of its own
+    replies = asyncio.run(_converse(["x" * 1000, " i am Sam\n", "exit\n"]))
+    assert replies[1:] == [TOO_LONG]
+
+def test_overlong_line_then_next_turn():
+    replies = asyncio.run(_converse(["i" * 500 + " am Sam\n", "my name is Sam\n", "exit\n"]))
+    assert replies[1:] == [TOO_LONG, "Did I get that right? Your name is Sam, correct?"]
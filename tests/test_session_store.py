@@ -0,0 +1,37 @@
+import threading
+import time
+
+from session_store import SessionStore
+
+def test_load_reads_own_writes(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.db"))
+    session_id = store.create_session(formal=False)
+    store.record_turn(session_id, 1, "I saw a man", "What did he look like?", timestamp=1.0)
+    assert store.load(session_id) == (False, None, [("I saw a man", "What did he look like?", 1.0)])
+    assert store.session_ids() == [session_id]
+    store.close()
+
+def test_load_does_not_wait_for_other_sessions(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.db"), flush_interval=0.01)
+    session_id = store.create_session()
+    stopped = threading.Event()
+
+    def keep_writing():
+        # Another session whose writes never let the queue drain
+        other = store.create_session()
+        turn = 0
+        while not stopped.is_set():
+            turn += 1
+            store.record_turn(other, turn, "statement", "response")
+
+    writer = threading.Thread(target=keep_writing)
+    writer.start()
+    try:
+        start = time.monotonic()
+        assert store.load(session_id) is not None
+        assert session_id in store.session_ids()
+        assert time.monotonic() - start < 5
+    finally:
+        stopped.set()
+        writer.join()
+        store.close()
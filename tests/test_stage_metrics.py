@@ -0,0 +1,33 @@
+import pickle
+import threading
+
+import pal_rules
+import witness_rules
+from stage_metrics import Metrics
+
+def test_concurrent_updates_are_counted():
+    metrics = Metrics(enabled=True)
+    rules = witness_rules.load_rules(cache_dir=None)
+
+    def work():
+        for _ in range(20000):
+            metrics.observe("patterns", 0.001)
+            metrics.rule("response:x", True, 0.001)
+            rules.count("reflective")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    snapshot = metrics.snapshot()
+    assert snapshot["stages"]["patterns"]["count"] == 80000
+    assert snapshot["rules"]["response:x"]["attempts"] == 80000
+    assert rules.snapshot()["hits"] == {"reflective": 80000}
+    assert 'bot_rule_attempts_total{rule="response:x"} 80000' in metrics.to_prometheus()
+
+def test_rules_survive_the_pickle_cache():
+    for module in (pal_rules, witness_rules):
+        rules = pickle.loads(pickle.dumps(module.load_rules(cache_dir=None)))
+        rules.count("fallback")
+        assert rules.snapshot()["hits"] == {"fallback": 1}
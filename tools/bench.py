@@ -0,0 +1,301 @@
+"""
+Benchmark all bots on synthetic corpora and write the results as JSON.
+
+Every bot answers the same generated sessions: short replies, long multi-sentence
+statements, contraction-heavy text and adversarial inputs (empty, huge, punctuation
+floods, backtracking bait), plus recorded transcripts given with --corpus. Reported
+per bot and corpus are turns/s and the p50/p99/max turn latency; per bot the cold
+startup time, the first turn and the peak memory of many concurrent sessions, all
+measured in a fresh interpreter.
+
+The corpora and every session's random generator derive from --seed, so two runs
+answer exactly the same turns. Compare a commit against a saved run:
+
+    python tools/bench.py --output base.json
+    python tools/bench.py --compare base.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from bots import BOTS, ROOT, load_rules  # Makes the bot and shared modules importable
+from bench_timing import percentile
+from replay import read_sessions, session_rng
+
+# Inputs that end a conversation, never generated
+END_WORDS = {"exit", "quit", "end", "stop"}
+
+SHORT_REPLIES = ["yes", "no", "Tom", "maybe", "ok", "I don't know", "my name is anna", "Anna", "sure", "not really",
+                 "hello", "thanks", "I guess so", "why?", "fine"]
+SUBJECTS = ["I", "my friend", "the man", "a woman", "my teacher", "the driver", "we", "they", "my sister", "the suspect"]
+VERBS = ["saw", "heard", "like", "hate", "noticed", "followed", "love", "met", "remember", "was afraid of"]
+OBJECTS = ["a red car", "the tall person", "music", "the school", "my family", "a dog near the big park",
+           "the main street", "a man with a black jacket", "the store at the corner", "my friends"]
+ADJECTIVES = ["sad", "happy", "angry", "tired", "scared", "nervous", "excited", "bored", "lonely", "sure"]
+TIMES = ["at noon", "around 5 pm", "yesterday", "last night", "in the morning", "after school"]
+CONTRACTION_SENTENCES = [
+    "I'm {adj} because they're not here",
+    "I don't know why he's always {adj}",
+    "she's sure it wasn't {obj}",
+    "we're {adj} and we can't stop thinking about {obj}",
+    "you're right, I didn't see {obj}",
+    "it's {time}, isn't it",
+    "they weren't {adj}, but I won't forget {obj}",
+    "I can't believe it's {obj} again",
+    "he didn't like {obj} and I'm {adj}",
+    "aren't you {adj}? I'm not",
+]
+
+def _sentence(rng):
+    return f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(TIMES)}"
+
+def _contraction_sentence(rng):
+    sentence = rng.choice(CONTRACTION_SENTENCES).format(adj=rng.choice(ADJECTIVES), obj=rng.choice(OBJECTS),
+                                                        time=rng.choice(TIMES))
+    case = rng.random()
+    if case < 0.1:
+        return sentence.upper()
+    if case < 0.2:
+        return sentence.replace("'", "’")  # Typographic apostrophes as pasted from a word processor
+    return sentence
+
+def _adversarial(rng, length):
+    kind = rng.randrange(9)
+    if kind == 0:
+        return ""
+    if kind == 1:
+        return " \t " * rng.randint(1, 50)
+    if kind == 2:
+        return "a" * length  # One huge token
+    if kind == 3:
+        return ("at the big " * length)[:length]  # Starts of the location rules that never complete
+    if kind == 4:
+        return ("!?." * length)[:length]
+    if kind == 5:
+        return ("my name is " * length)[:length]
+    if kind == 6:
+        return (_sentence(rng) + "\n") * (length // 60)
+    if kind == 7:
+        return ("über café \U0001F600 naïve " * length)[:length]
+    return "the man was " + "very " * (length // 5)
+
+# Corpus name -> generator(rng, length) of one input
+GENERATORS = {
+    "short": lambda rng, length: rng.choice(SHORT_REPLIES),
+    "long": lambda rng, length: " ".join(f"{_sentence(rng)}{rng.choice('.!?')}" for _ in range(rng.randint(5, 15))),
+    "contractions": lambda rng, length: ". ".join(_contraction_sentence(rng) for _ in range(rng.randint(1, 4))),
+    "adversarial": _adversarial,
+}
+
+def synthetic_corpus(name, sessions, turns, seed, length=5000):
+    """Generate [(session ID, [input, ...]), ...] of one corpus, the same for the same seed"""
+    rng = random.Random(f"{seed}:{name}")
+    generate = GENERATORS[name]
+    corpus = []
+    for number in range(sessions):
+        inputs = []
+        while len(inputs) < turns:
+            text = generate(rng, length)
+            if text.strip().lower() not in END_WORDS:
+                inputs.append(text)
+        corpus.append((f"{name}-{number}", inputs))
+    return corpus
+
+def recorded_corpus(paths):
+    """Inputs of recorded JSONL transcripts (see replay.py)"""
+    return [(session_id, [text for text, _ in turns]) for session_id, turns in read_sessions(paths)]
+
+# Answers that take sophisticated.py through its name introduction before a session is timed
+INTRODUCTION = ("My name is Sam", "yes")
+
+def skip_introduction(bot):
+    """Answer a fresh bot's introduction dialogue, so the following turns reach its chat pipeline"""
+    if getattr(bot, "stage", None) is not None:  # Only sophisticated.py has conversation stages
+        for text in INTRODUCTION:
+            bot.respond(text)
+        if bot.stage != "chat":
+            raise RuntimeError(f"The introduction did not end after {INTRODUCTION}")
+    return bot
+
+def bench_turns(bot_name, corpus, seed, introduce=False):
+    """
+    Answer every session of a corpus with a fresh bot, returns throughput and latency percentiles.
+
+    Synthetic corpora skip the introduction, recorded ones hold the user's own answers to it.
+    """
+    clock = time.perf_counter
+    latencies = []
+    # Warm up caches and lazily compiled rules, the cold start is measured separately
+    warm_up = BOTS[bot_name](session_rng(seed, "warm-up"))
+    if not introduce:
+        skip_introduction(warm_up)
+    for text in corpus[0][1]:
+        warm_up.respond(text)
+
+    start = clock()
+    for session_id, inputs in corpus:
+        bot = BOTS[bot_name](session_rng(seed, session_id))
+        if not introduce:
+            introduction = clock()
+            skip_introduction(bot)
+            start += clock() - introduction  # Not timed, the turns after it are
+        for text in inputs:
+            before = clock()
+            reply = bot.respond(text)
+            latencies.append(clock() - before)
+            if reply is None:
+                break
+    elapsed = clock() - start
+
+    latencies.sort()
+    return {
+        "sessions": len(corpus),
+        "turns": len(latencies),
+        "turns_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+        "max_ms": latencies[-1] * 1e3,
+    }
+
+def measure_process(bot_name, corpora, sessions, seed):
+    """Startup and memory of one bot, run in this (fresh) interpreter"""
+    start = time.perf_counter()
+    bot = BOTS[bot_name](session_rng(seed, "startup"))  # Imports the bot
+    load_rules(bot_name)  # The bots load their rules lazily, startup includes them all the same
+    constructed = time.perf_counter()
+    bot.respond("I saw a man at the main street")
+    first_turn = time.perf_counter()
+
+    # Many sessions alive at once, answered turn by turn like a server does
+    streams = [[text for _, inputs in corpus for text in inputs] for corpus in corpora.values()]
+    inputs = [text for texts in zip(*streams) for text in texts]  # Every corpus in turn
+    tracemalloc.start()
+    bots = [skip_introduction(BOTS[bot_name](session_rng(seed, f"memory-{number}"))) for number in range(sessions)]
+    for turn, text in enumerate(inputs[:sessions * 10]):
+        bots[turn % sessions].respond(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "startup_ms": (constructed - start) * 1e3,
+        "first_turn_ms": (first_turn - constructed) * 1e3,
+        "sessions": sessions,
+        "peak_bytes": peak,
+        "peak_bytes_per_session": peak / sessions,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+def bench_process(bot_name, args, repeat=3):
+    """Run measure_process in fresh interpreters, keeps the fastest startup"""
+    command = [sys.executable, os.path.abspath(__file__), "--process", bot_name, "--seed", str(args.seed),
+               "--sessions", str(args.sessions), "--turns", str(args.turns), "--length", str(args.length)]
+    runs = [json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout)
+            for _ in range(repeat)]
+    return min(runs, key=lambda run: run["startup_ms"])
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, check=True, capture_output=True,
+                              text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def build_corpora(args):
+    corpora = {name: synthetic_corpus(name, args.sessions, args.turns, args.seed, args.length)
+               for name in args.corpora}
+    if args.corpus:
+        corpora["recorded"] = recorded_corpus(args.corpus)
+    return corpora
+
+# Latency differences below this are timer noise, never a regression
+NOISE_MS = 0.05
+
+# Result key -> True if higher is better
+THROUGHPUT_KEYS = {"turns_per_second": True, "p50_ms": False, "p99_ms": False}
+PROCESS_KEYS = {"startup_ms": False, "peak_bytes": False}
+
+def _worse(key, higher_is_better, current, baseline, tolerance):
+    if key.endswith("_ms") and current - baseline < NOISE_MS:
+        return False
+    if higher_is_better:
+        return current < baseline * (1 - tolerance)
+    return current > baseline * (1 + tolerance)
+
+def compare(results, baseline, tolerance):
+    """Return a description of every measurement that got worse than the baseline by more than tolerance"""
+    regressions = []
+    for bot_name, result in results["bots"].items():
+        base = baseline.get("bots", {}).get(bot_name)
+        if base is None:
+            continue
+        for corpus, turns in result["corpora"].items():
+            base_turns = base["corpora"].get(corpus)
+            for key, higher_is_better in THROUGHPUT_KEYS.items():
+                if base_turns and _worse(key, higher_is_better, turns[key], base_turns[key], tolerance):
+                    regressions.append(f"{bot_name} {corpus} {key}: {base_turns[key]:.3f} -> {turns[key]:.3f}")
+        for key, higher_is_better in PROCESS_KEYS.items():
+            if _worse(key, higher_is_better, result["process"][key], base["process"][key], tolerance):
+                regressions.append(f"{bot_name} {key}: {base['process'][key]:.3f} -> {result['process'][key]:.3f}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bots, exits with 1 on a regression against --compare")
+    parser.add_argument("--bots", nargs="+", choices=sorted(BOTS), default=["simple", "sophisticated", "witness"])
+    parser.add_argument("--corpora", nargs="+", choices=sorted(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--corpus", nargs="+", help="recorded JSONL transcripts, benchmarked as corpus 'recorded'")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sessions", type=int, default=200, help="sessions per synthetic corpus")
+    parser.add_argument("--turns", type=int, default=10, help="turns per synthetic session")
+    parser.add_argument("--length", type=int, default=5000, help="characters of a long adversarial input")
+    parser.add_argument("--output", help="write the results to this file (default: stdout)")
+    parser.add_argument("--compare", help="results of an earlier run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown (default: 0.2)")
+    parser.add_argument("--process", help=argparse.SUPPRESS)  # Internal: measure one bot in this interpreter
+    args = parser.parse_args()
+
+    if args.process:
+        args.corpora = list(GENERATORS)
+        json.dump(measure_process(args.process, build_corpora(args), args.sessions, args.seed), sys.stdout)
+        return 0
+
+    corpora = build_corpora(args)
+    results = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "seed": args.seed,
+        "sessions": args.sessions,
+        "turns": args.turns,
+        "bots": {},
+    }
+    for bot_name in args.bots:
+        print(f"{bot_name} ...", file=sys.stderr)
+        results["bots"][bot_name] = {
+            "corpora": {name: bench_turns(bot_name, corpus, args.seed, introduce=name == "recorded")
+                        for name, corpus in corpora.items()},
+            "process": bench_process(bot_name, args),
+        }
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    json.dump(results, output, indent=2)
+    output.write("\n")
+    if output is not sys.stdout:
+        output.close()
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import importlib
+import os
+import sys
+
+# The bots are flat script directories, make their modules and the shared ones importable from here
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for directory in ("shared", "pal-bot", "witness_bot"):
+    path = os.path.join(ROOT, directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+_dictionary = None
+
+def _shared_dictionary():
+    """One EnglishDictionary per process, shared by all Pal bots"""
+    global _dictionary
+    if _dictionary is None:
+        from english_dict import EnglishDictionary
+        _dictionary = EnglishDictionary()
+    return _dictionary
+
+def simple_bot(rng):
+    from simple import PalChatbot
+    return PalChatbot(rng=rng)
+
+def sophisticated_bot(rng):
+    from sophisticated import PalChatbot
+    return PalChatbot(dictionary=_shared_dictionary(), rng=rng)
+
+def witness_bot(rng, formal=True):
+    from pacing import NoPacing
+    from witness_bot import WitnessInterviewBot
+    return WitnessInterviewBot(formal=formal, pacing=NoPacing(), rng=rng)
+
+# Bot name -> factory(rng), every bot answers one turn with respond(text)
+BOTS = {
+    "simple": simple_bot,
+    "sophisticated": sophisticated_bot,
+    "witness": witness_bot,
+    "witness-informal": lambda rng: witness_bot(rng, formal=False),
+}
+
+def load_rules(bot_name):
+    """Load the process-wide rules of a bot, which it otherwise loads on its first turn"""
+    module = "witness_rules" if bot_name.startswith("witness") else "pal_rules"
+    return importlib.import_module(module).default_rules()
@@ -0,0 +1,136 @@
+"""
+Replay recorded conversations through a bot and report the replies that changed.
+
+Transcripts are JSON lines with one record per message, the records of a session
+must be consecutive:
+
+    {"session": "s1", "role": "user", "text": "I saw a man at the main street"}
+    {"session": "s1", "role": "bot", "text": "What did he look like?"}
+
+"user" and "witness" records are replayed, the next other record is the reply they
+are compared with. An input without a reply means the bot ended the conversation.
+Files written by the witness bot's TranscriptWriter have no session key, each of
+them is one session.
+
+Every session gets its own random.Random seeded from --seed and the session ID, so a
+replay is deterministic however the sessions are spread over the worker processes.
+Record a baseline once with --record, then replay it after every rule change:
+
+    python tools/replay.py witness corpus.jsonl --record baseline.jsonl
+    python tools/replay.py witness baseline.jsonl --diff changes.jsonl
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import deque
+from itertools import islice
+
+from bots import BOTS
+
+INPUT_ROLES = {"user", "witness"}
+
+def read_sessions(paths):
+    """Stream (session ID, [(input, recorded reply), ...]) from JSONL transcripts"""
+    for path in paths:
+        session_id, turns = None, []
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                record_session = str(record.get("session", path))
+                if record_session != session_id:
+                    if turns:
+                        yield session_id, turns
+                    session_id, turns = record_session, []
+                if record["role"] in INPUT_ROLES:
+                    turns.append((record["text"], None))
+                elif turns and turns[-1][1] is None:
+                    turns[-1] = (turns[-1][0], record["text"])
+        if turns:
+            yield session_id, turns
+
+def session_rng(seed, session_id):
+    """Random generator of one session, independent of the process replaying it"""
+    return random.Random(f"{seed}:{session_id}")
+
+def replay_session(bot_name, seed, session_id, turns):
+    """Run the inputs of one session through a fresh bot, returns its replies"""
+    bot = BOTS[bot_name](session_rng(seed, session_id))
+    return [bot.respond(text) for text, _ in turns]
+
+def _replay_chunk(bot_name, seed, sessions):
+    return [(session_id, turns, replay_session(bot_name, seed, session_id, turns)) for session_id, turns in sessions]
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+def replay(sessions, bot_name, seed=0, workers=None, chunk_size=64):
+    """
+    Replay sessions on a process pool, yields (session ID, turns, replies) in input order.
+
+    At most a few chunks per worker are in flight, so a corpus of any size is streamed.
+    workers=1 replays in this process.
+    """
+    chunks = _chunks(sessions, chunk_size)
+    if workers == 1:
+        for chunk in chunks:
+            yield from _replay_chunk(bot_name, seed, chunk)
+        return
+
+    workers = workers or os.cpu_count()
+    with multiprocessing.Pool(workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_replay_chunk, (bot_name, seed, chunk)))
+            if len(pending) >= 4 * workers:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay JSONL transcripts through a bot, exits with 1 if a reply changed")
+    parser.add_argument("bot", choices=sorted(BOTS))
+    parser.add_argument("transcripts", nargs="+", help="JSONL transcript files")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="sessions per worker task")
+    parser.add_argument("--diff", help="write changed replies as JSON lines to this file (default: stdout)")
+    parser.add_argument("--record", help="write the replayed conversations to this file, e.g. as the next baseline")
+    args = parser.parse_args()
+
+    diff = open(args.diff, "w", encoding="utf-8") if args.diff else sys.stdout
+    record = open(args.record, "w", encoding="utf-8") if args.record else None
+    session_count = turn_count = changed = 0
+    start = time.perf_counter()
+
+    for session_id, turns, replies in replay(read_sessions(args.transcripts), args.bot, args.seed, args.workers, args.chunk_size):
+        session_count += 1
+        for turn, ((text, recorded), reply) in enumerate(zip(turns, replies), 1):
+            turn_count += 1
+            if reply != recorded:
+                changed += 1
+                diff.write(json.dumps({"session": session_id, "turn": turn, "input": text,
+                                       "recorded": recorded, "replayed": reply}, ensure_ascii=False) + "\n")
+            if record:
+                record.write(json.dumps({"session": session_id, "role": "user", "text": text}, ensure_ascii=False) + "\n")
+                if reply is not None:
+                    record.write(json.dumps({"session": session_id, "role": "bot", "text": reply}, ensure_ascii=False) + "\n")
+
+    seconds = time.perf_counter() - start
+    if diff is not sys.stdout:
+        diff.close()
+    if record:
+        record.close()
+    print(f"{session_count} sessions, {turn_count} turns, {changed} changed replies "
+          f"in {seconds:.1f} s ({turn_count / max(seconds, 1e-9):.0f} turns/s)", file=sys.stderr)
+    return 1 if changed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+Stream utterances through the bots' matching stages and report which rules fire.
+
+Stages:
+
+    simple         keyword patterns of simple.py, in table order
+    witness        response patterns of the witness bot (get_response)
+    sophisticated  template ladder of sophisticated.py, per component signature
+
+Every rule of a stage is tried on every utterance, so besides the rule that answers
+(its hits) we learn every rule that would have matched (its matches) and what each
+regex costs. A rule that never matches is dead, one that matches but never answers is
+shadowed by the earlier rules listed next to it. Utterances no rule answers take the
+fallback path; the witness bot's empty catch-all pattern is reported separately.
+
+Input files hold one utterance per line, or JSON lines as read by replay.py (only
+"user" and "witness" records are analyzed). Files are streamed in chunks, memory stays
+constant however large they are, and chunks are spread over a process pool:
+
+    python tools/rule_coverage.py corpus.jsonl --json coverage.json
+    python tools/rule_coverage.py utterances.txt --stages simple --pal-rules candidate.json
+
+The witness bot's stateful paths (too-short inputs aside) are not modelled: repeated
+statements and reworded repeats depend on the interview and are skipped.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter, deque
+
+import bots  # Makes the bot modules importable
+from replay import INPUT_ROLES, _chunks
+
+class Coverage:
+    """Counters of one stage, mergeable across processes"""
+
+    def __init__(self, stage, rules):
+        self.stage = stage
+        self.rules = list(rules)  # Rule labels in priority order
+        self.utterances = 0
+        self.paths = Counter()  # "rule", "catch-all", "fallback", "too short"
+        self.seconds = 0.0  # Whole stage, as a turn would run it
+        self.hits = [0] * len(self.rules)
+        self.matches = [0] * len(self.rules)
+        self.rule_seconds = [0.0] * len(self.rules)
+        self.shadowed_by = [Counter() for _ in self.rules]  # Winners of the utterances a rule matched but lost
+
+    def merge(self, other):
+        self.utterances += other.utterances
+        self.paths.update(other.paths)
+        self.seconds += other.seconds
+        for rule in range(len(self.rules)):
+            self.hits[rule] += other.hits[rule]
+            self.matches[rule] += other.matches[rule]
+            self.rule_seconds[rule] += other.rule_seconds[rule]
+            self.shadowed_by[rule].update(other.shadowed_by[rule])
+
+    def record(self, matched, seconds=None):
+        """Count one utterance given the indices of all rules that matched, in order"""
+        for rule in matched:
+            self.matches[rule] += 1
+        if matched:
+            winner = matched[0]
+            self.hits[winner] += 1
+            for rule in matched[1:]:
+                self.shadowed_by[rule][winner] += 1
+        if seconds:
+            for rule, cost in enumerate(seconds):
+                self.rule_seconds[rule] += cost
+
+    def summary(self, top=None):
+        rules = []
+        for rule, label in enumerate(self.rules):
+            status = "dead" if not self.matches[rule] else "shadowed" if not self.hits[rule] else "live"
+            rules.append({
+                "rule": label,
+                "priority": rule,
+                "status": status,
+                "hits": self.hits[rule],
+                "matches": self.matches[rule],
+                "seconds": self.rule_seconds[rule],
+                "shadowed_by": [self.rules[winner] for winner, _ in self.shadowed_by[rule].most_common(3)],
+            })
+        rules.sort(key=lambda rule: rule["seconds"], reverse=True)
+        utterances = max(self.utterances, 1)
+        return {
+            "stage": self.stage,
+            "utterances": self.utterances,
+            "paths": dict(self.paths),
+            "fallback_rate": self.paths["fallback"] / utterances,
+            "catch_all_rate": self.paths["catch-all"] / utterances,
+            "stage_seconds": self.seconds,
+            "regex_seconds": sum(self.rule_seconds),
+            "dead": sum(rule["status"] == "dead" for rule in rules),
+            "shadowed": sum(rule["status"] == "shadowed" for rule in rules),
+            "rules": rules[:top] if top else rules,
+        }
+
+def _timed_matches(patterns, text):
+    """Search every compiled pattern, returns (indices of the matching ones, seconds per pattern)"""
+    clock = time.perf_counter
+    matched, seconds = [], []
+    for rule, pattern in enumerate(patterns):
+        start = clock()
+        match = pattern.search(text)
+        seconds.append(clock() - start)
+        if match:
+            matched.append(rule)
+    return matched, seconds
+
+class SimpleStage:
+    """Keyword patterns of simple.py, a turn without a keyword takes a fallback response"""
+    name = "simple"
+
+    def __init__(self, rules_path=None):
+        from pal_rules import default_rules, load_rules
+        self.rules = load_rules(rules_path) if rules_path else default_rules()
+        matcher = self.rules.keyword_matcher
+        self.patterns = [matcher.compile(rule) for rule in range(len(matcher))]
+
+    def coverage(self):
+        return Coverage(self.name, self.rules.keyword_matcher.patterns)
+
+    def analyze(self, text, coverage):
+        start = time.perf_counter()
+        self.rules.keyword_matcher.first_match(text)  # The prefiltered lookup a turn runs
+        coverage.seconds += time.perf_counter() - start
+        matched, seconds = _timed_matches(self.patterns, text)
+        coverage.record(matched, seconds)
+        coverage.paths["rule" if matched else "fallback"] += 1
+
+class WitnessStage:
+    """Response patterns of the witness bot, unmatched turns get a reflective prompt"""
+    name = "witness"
+
+    def __init__(self, rules_path=None):
+        from witness_rules import default_rules, load_rules
+        self.rules = load_rules(rules_path) if rules_path else default_rules()
+        self.patterns = [pattern for pattern, _ in self.rules.patterns]
+        # Patterns matching the empty string answer everything that reaches them
+        self.catch_all = {rule for rule, pattern in enumerate(self.patterns) if pattern.search("")}
+
+    def coverage(self):
+        return Coverage(self.name, [pattern.pattern or "<empty catch-all>" for pattern in self.patterns])
+
+    def analyze(self, text, coverage):
+        if len(text.split()) < 3:  # get_response asks for details before trying any pattern
+            coverage.paths["too short"] += 1
+            return
+        start = time.perf_counter()
+        self.rules.patterns.match(text)
+        coverage.seconds += time.perf_counter() - start
+        matched, seconds = _timed_matches(self.patterns, self.rules.patterns.prepare(text))
+        coverage.record(matched, seconds)
+        if not matched:
+            coverage.paths["fallback"] += 1
+        elif matched[0] in self.catch_all:
+            coverage.paths["catch-all"] += 1
+        else:
+            coverage.paths["rule"] += 1
+
+class LadderStage:
+    """Template ladder of sophisticated.py, the first sentence with a covered signature answers"""
+    name = "sophisticated"
+
+    def __init__(self, rules_path=None):
+        from pal_rules import default_rules, load_rules
+        from sophisticated import PalChatbot
+        from templates import COMPONENT_BITS, signature
+        from turn_cache import TurnCache
+        self.signature = signature
+        rules = load_rules(rules_path) if rules_path else default_rules()
+        # Uncached, every utterance is analyzed once and should not crowd the shared cache
+        self.bot = PalChatbot(dictionary=bots._shared_dictionary(), rules=rules, cache=TurnCache(max_size=0))
+        self.templates = rules.templates.rules
+        self.required = [sum(COMPONENT_BITS[component] for component in rule["requires"]) for rule in self.templates]
+
+    def coverage(self):
+        return Coverage(self.name, ["+".join(rule["requires"]) or "<no components>" for rule in self.templates])
+
+    def analyze(self, text, coverage):
+        start = time.perf_counter()
+        answered = False
+        for words in self.bot.sentences(text):
+            components = self.bot.extract_components(words)
+            sig = self.signature(*components)
+            matched = [rule for rule, required in enumerate(self.required) if sig & required == required]
+            coverage.record(matched)
+            if matched:
+                answered = True
+                break
+        coverage.seconds += time.perf_counter() - start
+        coverage.paths["rule" if answered else "fallback"] += 1
+
+STAGES = {stage.name: stage for stage in (SimpleStage, WitnessStage, LadderStage)}
+
+def read_utterances(paths):
+    """Stream the utterances of text or JSONL files"""
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                line = line.rstrip("\n")
+                if line.startswith("{"):
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        record = None
+                    if isinstance(record, dict) and "text" in record:
+                        if record.get("role", "user") in INPUT_ROLES:
+                            yield record["text"]
+                        continue
+                if line.strip():
+                    yield line
+
+# Stage analyzers of a worker process, built once by _init_worker
+_stages = None
+
+def _init_worker(stage_names, pal_rules, witness_rules):
+    global _stages
+    paths = {"simple": pal_rules, "sophisticated": pal_rules, "witness": witness_rules}
+    _stages = [STAGES[name](paths[name]) for name in stage_names]
+
+def _analyze_chunk(utterances):
+    coverages = [stage.coverage() for stage in _stages]
+    for text in utterances:
+        for stage, coverage in zip(_stages, coverages):
+            coverage.utterances += 1
+            stage.analyze(text, coverage)
+    return coverages
+
+def analyze(utterances, stage_names, workers=None, chunk_size=1000, pal_rules=None, witness_rules=None):
+    """Return the merged Coverage of every stage, workers=1 analyzes in this process"""
+    initargs = (stage_names, pal_rules, witness_rules)
+    chunks = _chunks(utterances, chunk_size)
+    totals = None
+
+    def merge(coverages):
+        nonlocal totals
+        if totals is None:
+            totals = coverages
+        else:
+            for total, coverage in zip(totals, coverages):
+                total.merge(coverage)
+
+    if workers == 1:
+        _init_worker(*initargs)
+        for chunk in chunks:
+            merge(_analyze_chunk(chunk))
+    else:
+        workers = workers or os.cpu_count()
+        with multiprocessing.Pool(workers, _init_worker, initargs) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.apply_async(_analyze_chunk, (chunk,)))
+                if len(pending) >= 4 * workers:  # Bounded in flight, the input is streamed
+                    merge(pending.popleft().get())
+            while pending:
+                merge(pending.popleft().get())
+
+    if totals is None:  # No input at all
+        _init_worker(*initargs)
+        totals = [stage.coverage() for stage in _stages]
+    return totals
+
+def print_report(summaries, file=sys.stdout):
+    for summary in summaries:
+        paths = ", ".join(f"{path} {count}" for path, count in sorted(summary["paths"].items()))
+        print(f"== {summary['stage']}: {summary['utterances']} utterances ({paths}) ==", file=file)
+        print(f"fallback {summary['fallback_rate']:.1%}, catch-all {summary['catch_all_rate']:.1%}, "
+              f"stage {summary['stage_seconds'] * 1e3:.1f} ms, all rules tried {summary['regex_seconds'] * 1e3:.1f} ms, "
+              f"{summary['dead']} dead, {summary['shadowed']} shadowed", file=file)
+        print(f"{'status':8s}  {'hits':>8s}  {'matches':>8s}  {'ms':>9s}  rule", file=file)
+        for rule in summary["rules"]:
+            shadowed_by = f"  (shadowed by {', '.join(map(repr, rule['shadowed_by']))})" if rule["status"] == "shadowed" else ""
+            print(f"{rule['status']:8s}  {rule['hits']:8d}  {rule['matches']:8d}  {rule['seconds'] * 1e3:9.2f}  "
+                  f"{rule['rule']!r}{shadowed_by}", file=file)
+        print(file=file)
+
+def main():
+    parser = argparse.ArgumentParser(description="Report rule hits, dead and shadowed rules, fallback rate and regex cost")
+    parser.add_argument("inputs", nargs="+", help="utterance files, plain text or JSONL transcripts")
+    parser.add_argument("--stages", nargs="+", choices=sorted(STAGES), default=list(STAGES))
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="utterances per worker task")
+    parser.add_argument("--pal-rules", help="Pal rule bundle to analyze (default: the installed rules.json)")
+    parser.add_argument("--witness-rules", help="witness rule bundle to analyze (default: the installed rules.json)")
+    parser.add_argument("--top", type=int, help="list only the N most expensive rules per stage")
+    parser.add_argument("--json", help="also write the full report as JSON to this file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    coverages = analyze(read_utterances(args.inputs), args.stages, args.workers, args.chunk_size,
+                        args.pal_rules, args.witness_rules)
+    summaries = [coverage.summary(args.top) for coverage in coverages]
+    print_report(summaries)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(summaries, file, indent=2, ensure_ascii=False)
+    print(f"Analyzed in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
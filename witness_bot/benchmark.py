@@ -0,0 +1,189 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+# Timing helpers are shared with the Pal benchmark and tools/bench.py, they live in shared/
+SHARED_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shared")
+if SHARED_DIR not in sys.path:
+    sys.path.insert(0, SHARED_DIR)
+
+from bench_timing import best_time, percentile
+from fact_extractor import DEFAULT_EXTRACTOR, FACT_RULES, FactExtractor
+from pacing import NoPacing
+from witness_bot import NAME_PATTERNS, WitnessInterviewBot
+from witness_rules import MAX_INPUT_LENGTH, PatternSet, default_rules
+
+LEGACY_NAME_PATTERNS = [r'my name is (\w+)', r"i'm (\w+)", r"i am (\w+)", r"(\w+) (is )?my name"]
+
+# The bundled response patterns and the unbounded originals they replace
+LEGACY_RESPONSE_PATTERNS = {
+    r'i (saw|witnessed|observed) (.{0,120})': r'i (saw|witnessed|observed) (.*)',
+    r'(at|in|near) (the |a )?([\w\s]{1,60})': r'(at|in|near) (the |a )?([\w\s]+)',
+    r'(man|woman|person|guy|individual|suspect) (was|is|had|with) (.{0,120})': r'(man|woman|person|guy|individual|suspect) (was|is|had|with) (.*)',
+    r'': r'.*',
+}
+
+def adversarial_statements(length=20000, seed=42):
+    """Long and adversarial witness statements, keyed by name"""
+    rng = random.Random(seed)
+    words = ["i", "saw", "the", "man", "near", "a", "car", "at", "noon", "he", "was", "tall", "and", "then", "ran"]
+    prose = " ".join(rng.choice(words) for _ in range(length // 4))
+    return {
+        "short": "I saw a man at the main street around noon",
+        "long prose": prose[:length],
+        # Location rule: many 'at' starts, never followed by a street keyword
+        "at without street": ("at the big " * length)[:length],
+        "repeated in": ("in " * length)[:length],
+        "person without end": "the man was " + "very " * (length // 5),
+        "single word": "a" * length,
+        "pasted newlines": ("i saw it\n" * length)[:length],
+    }
+
+def bench_patterns(length=20000, budget_ms=50.0):
+    """
+    Worst-case latency of the regex stages of a witness turn (name, facts, response pattern)
+    on long and adversarial statements.
+
+    Compares the linear-time default matching mode with the old unbounded patterns and
+    reports the full default turn as well. Returns False if a default turn exceeds budget_ms.
+    """
+    safe_patterns = default_rules().patterns
+    legacy_patterns = PatternSet([(LEGACY_RESPONSE_PATTERNS.get(pattern.pattern, pattern.pattern), responses)
+                                  for pattern, responses in safe_patterns], max_input_length=None)
+    legacy_rules = [dict(rule) for rule in FACT_RULES]
+    legacy_rules[1]["pattern"] = r'at (the |a )?([\w\s]+) (street|avenue|road|park|building|store|shop)'
+    legacy_rules[2]["pattern"] = r'(man|woman|person|individual) (was |looked |appeared )?([\w\s]+)'
+    legacy_extractor = FactExtractor(legacy_rules)
+
+    within_budget = True
+    print(f"statement ({length} chars)   legacy matching (ms)  safe matching (ms)  safe turn (ms)")
+    for name, statement in adversarial_statements(length).items():
+        def legacy_matching():
+            for pattern in LEGACY_NAME_PATTERNS:
+                if re.search(pattern, statement.lower()):
+                    break
+            legacy_extractor.extract(statement, 1)
+            legacy_patterns.match(statement)
+
+        def safe_matching():
+            text = statement.lower()[:MAX_INPUT_LENGTH]
+            for pattern in NAME_PATTERNS:
+                if pattern.search(text):
+                    break
+            DEFAULT_EXTRACTOR.extract(statement, 1)
+            safe_patterns.match(statement)
+
+        def safe_turn():
+            WitnessInterviewBot(pacing=NoPacing()).respond(statement)
+
+        legacy_ms = best_time(legacy_matching) * 1e3
+        safe_ms = best_time(safe_matching) * 1e3
+        turn_ms = best_time(safe_turn) * 1e3
+        flag = "" if turn_ms <= budget_ms else "  OVER BUDGET"
+        within_budget = within_budget and turn_ms <= budget_ms
+        print(f"{name:25s}  {legacy_ms:20.2f}  {safe_ms:18.2f}  {turn_ms:14.2f}{flag}")
+    return within_budget
+
+STATEMENTS = ["My name is Tom", "I saw a man at the main street at noon", "He was tall and wore a red jacket",
+              "There was a robbery", "I was scared", "It happened around 10:30", "He ran near the park"]
+
+def bench_memory(sessions=200, turns=(0, 10, 50), seed=42):
+    """Bytes per interview in memory after a number of witness turns"""
+    def bytes_per_session(make_bot, turns):
+        make_bot(random.Random(seed)).respond("warm up the shared tables")
+        rng = random.Random(seed)
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        bots = [make_bot(random.Random(i)) for i in range(sessions)]
+        for bot in bots:
+            for turn in range(turns):
+                bot.respond(f"{rng.choice(STATEMENTS)} {turn}")
+        allocated = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        return allocated / sessions
+
+    print("session        " + "".join(f"{turn:>4d} turns (B)" for turn in turns))
+    for name, make_bot in {"seeded rng": lambda rng: WitnessInterviewBot(pacing=NoPacing(), rng=rng),
+                           "shared rng": lambda rng: WitnessInterviewBot(pacing=NoPacing())}.items():
+        print(f"{name:13s}  " + "".join(f"{bytes_per_session(make_bot, turn):14.0f}" for turn in turns))
+
+def _request(port, method, path, payload=None):
+    """One HTTP/JSON request, returns the decoded response"""
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    body = json.dumps(payload) if payload is not None else None
+    connection.request(method, path, body, {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    result = json.loads(response.read())
+    connection.close()
+    if response.status >= 400:
+        raise RuntimeError(f"{method} {path}: {response.status} {result}")
+    return result
+
+def _interview(port, turns, rng, latencies):
+    session_id = _request(port, "POST", "/sessions", {"formal": rng.random() < 0.5})["session"]
+    for turn in range(turns):
+        start = time.perf_counter()
+        _request(port, "POST", f"/sessions/{session_id}/turns", {"text": f"{rng.choice(STATEMENTS)} {turn}"})
+        latencies.append(time.perf_counter() - start)
+    _request(port, "DELETE", f"/sessions/{session_id}")
+
+def bench_http(concurrency=(1, 8, 64), interviews=4, turns=10, workers=8, seed=42):
+    """
+    Load test witness_server.py: 1, 8 and 64 terminals interviewing at the same time.
+
+    Every terminal runs `interviews` interviews one after another, so the server always
+    has `concurrency` open sessions. The clients run in this process, the server in its own.
+    """
+    print(f"terminals  turns/s  p50 (ms)  p99 (ms)  server CPU (s)  ({workers} workers)")
+    for terminals in concurrency:
+        server = subprocess.Popen([sys.executable, "witness_server.py", "--port", "0", "--workers", str(workers),
+                                   "--max-sessions", str(terminals), "--seed", str(seed)],
+                                  cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.PIPE, text=True)
+        port = int(server.stdout.readline().rsplit(":", 1)[1])  # Wait until the server listens
+        cpu_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+        latencies = []
+        def terminal(number):
+            rng = random.Random(f"{seed}:{number}")
+            for _ in range(interviews):
+                _interview(port, turns, rng, latencies)
+        threads = [threading.Thread(target=terminal, args=(number,)) for number in range(terminals)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        server.terminate()
+        server.wait()
+        cpu_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = (cpu_after.ru_utime + cpu_after.ru_stime) - (cpu_before.ru_utime + cpu_before.ru_stime)
+        print(f"{terminals:9d}  {len(latencies) / elapsed:7.0f}  {percentile(latencies, 0.5) * 1e3:8.2f}  "
+              f"{percentile(latencies, 0.99) * 1e3:8.2f}  {cpu:14.2f}")
+
+BENCHMARKS = {
+    "patterns": bench_patterns,
+    "memory": bench_memory,
+    "http": bench_http,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Witness bot benchmarks, exits with 1 if a latency budget is exceeded")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    args = parser.parse_args()
+
+    ok = True
+    for name in args.names or BENCHMARKS:
+        print(f"== {name} ==")
+        ok = BENCHMARKS[name]() is not False and ok
+    sys.exit(0 if ok else 1)
@@ -1,68 +1,109 @@
-import re
-from collections import defaultdict
+from collections import defaultdict, deque
+from transcript import TranscriptWriter
+from interview_stats import InterviewStats
+from fact_extractor import DEFAULT_EXTRACTOR
+from duplicates import NearDuplicateIndex
+from witness_metrics import METRICS
 
 class ContextManager:
-    def __init__(self):
-        self.user_statements = []
-        self.bot_responses = []
+    __slots__ = ("user_statements", "bot_responses", "stats", "transcript", "fact_extractor", "facts", "fact_history",
+                 "fact_history_size", "mentioned_topics", "duplicates", "_last_statement", "_last_repeat")
+
+    def __init__(self, history_size=50, transcript_path=None, fsync_every=0, fact_extractor=None, fact_history_size=20,
+                 duplicate_threshold=0.7, duplicate_capacity=1000):
+        """
+        Only the last history_size statements and responses are kept in memory. The full
+        interview is streamed to transcript_path (JSON lines) if one is given.
+        """
+        self.user_statements = deque(maxlen=history_size)
+        self.bot_responses = deque(maxlen=history_size)
+        self.stats = InterviewStats()  # Kept incrementally, survives history eviction
+        self.transcript = TranscriptWriter(transcript_path, fsync_every) if transcript_path else None
+        self.fact_extractor = fact_extractor or DEFAULT_EXTRACTOR
         self.facts = defaultdict(str)  # Store extracted facts about the witness/incident
+        self.fact_history = {}  # Every account of a fact with its turn, span and timestamp
+        self.fact_history_size = fact_history_size
         self.mentioned_topics = set()  # Track mentioned topics to avoid repetition
+        # Near-duplicate detection over the whole interview (bounded to duplicate_capacity statements)
+        self.duplicates = NearDuplicateIndex(threshold=duplicate_threshold, capacity=duplicate_capacity)
+        self._last_statement = None
+        self._last_repeat = None
         
-    def add_user_statement(self, statement):
-        """Add a user statement to the conversation history"""
+    def add_user_statement(self, statement, timestamp=None):
+        """Add a user statement to the conversation history, timestamp defaults to now"""
         self.user_statements.append(statement)
-        self._extract_facts(statement)
+        turn = self.stats.record_statement(statement)
+        if self.transcript:
+            self.transcript.write(turn, "witness", statement)
+        self._last_statement = statement
+        start = METRICS.clock()  # Per-stage timers, free unless METRICS is enabled
+        self._last_repeat = self.duplicates.check_and_add(statement, turn)
+        start = METRICS.lap("duplicates", start)
+        self._extract_facts(statement, timestamp)
+        METRICS.lap("facts", start)
         
     def add_bot_response(self, response):
         """Add a bot response to the conversation history"""
         self.bot_responses.append(response)
+        self.stats.record_response(response)
+        if self.transcript:
+            self.transcript.write(self.stats.statement_count, "officer", response)
+
+    def close(self):
+        """Flush and close the transcript file"""
+        if self.transcript:
+            self.transcript.close()
         
     def get_recent_user_statements(self, count=3):
         """Get the most recent user statements"""
-        return self.user_statements[-count:] if self.user_statements else []
+        return list(self.user_statements)[-count:] if self.user_statements else []
         
     def get_recent_bot_responses(self, count=3):
         """Get the most recent bot responses"""
-        return self.bot_responses[-count:] if self.bot_responses else []
+        return list(self.bot_responses)[-count:] if self.bot_responses else []
+        
+    def find_repeat(self, statement):
+        """Return the earlier statement (turn, similarity) that a statement nearly repeats, or None"""
+        if statement == self._last_statement:
+            return self._last_repeat  # Already looked up when it was added
+        return self.duplicates.query(statement)
         
     def add_fact(self, key, value):
         """Explicitly add a fact to the context"""
         self.facts[key] = value
-        self.mentioned_topics.add(key)
+        self._mention(key)
         
     def get_fact(self, key):
         """Retrieve a stored fact"""
         return self.facts.get(key, "")
         
-    def _extract_facts(self, statement):
+    def _mention(self, topic):
+        """Track a topic mentioned in the current turn"""
+        self.mentioned_topics.add(topic)
+        self.stats.record_topic(topic)
+
+    def _extract_facts(self, statement, timestamp=None):
         """Extract potential facts from user statements"""
-        # Try to extract time information
-        time_match = re.search(r'at (\d+[:.]\d+|noon|midnight|dawn|dusk)', statement.lower())
-        if time_match:
-            self.facts['time'] = time_match.group(1)
-            self.mentioned_topics.add('time')
-            
-        # Try to extract location information
-        location_match = re.search(r'at (the |a )?([\w\s]+) (street|avenue|road|park|building|store|shop)', statement.lower())
-        if location_match:
-            self.facts['location'] = location_match.group(2) + " " + location_match.group(3)
-            self.mentioned_topics.add('location')
-            
-        # Try to extract person descriptions
-        person_match = re.search(r'(man|woman|person|individual) (was |looked |appeared )?([\w\s]+)', statement.lower())
-        if person_match:
-            self.facts['person_description'] = person_match.group(3)
-            self.mentioned_topics.add('person')
-            
-        # Try to extract event type
-        event_match = re.search(r'(robbery|theft|assault|attack|shooting|murder|crime)', statement.lower())
-        if event_match:
-            self.facts['event_type'] = event_match.group(1)
-            self.mentioned_topics.add('event')
-    
+        for record in self.fact_extractor.extract(statement, self.stats.statement_count, timestamp):
+            self.facts[record.fact] = record.value
+            # A plain list, a deque per fact costs over 600 bytes even when nearly empty
+            history = self.fact_history.setdefault(record.fact, [])
+            history.append(record)
+            if len(history) > self.fact_history_size:
+                del history[0]
+            self._mention(record.topic)
+
+    def get_fact_history(self, key):
+        """All recorded accounts of a fact (latest fact_history_size), oldest first"""
+        return list(self.fact_history.get(key, ()))
+
+    def get_live_statistics(self):
+        """Current interview statistics as a dict, O(1) regardless of interview length"""
+        return self.stats.snapshot()
+
     def get_transcript_summary(self):
         """Generate a simple summary of the conversation"""
-        if not self.user_statements:
+        if not self.stats.statement_count:
             return "No interview data recorded."
             
         summary = []
@@ -72,20 +113,28 @@ class ContextManager:
             summary.append("EXTRACTED INFORMATION:")
             for key, value in self.facts.items():
                 if value:  # Only include non-empty values
-                    summary.append(f"- {key.replace('_', ' ').title()}: {value}")
+                    line = f"- {key.replace('_', ' ').title()}: {value}"
+                    # Point out conflicting accounts of the same fact
+                    others = {}
+                    for record in self.get_fact_history(key):
+                        if record.value != value:
+                            others.setdefault(record.value, record.turn)
+                    if others:
+                        line += " (also stated: " + ", ".join(f"{other} in turn {turn}" for other, turn in others.items()) + ")"
+                    summary.append(line)
         
         # Add conversation statistics
         summary.append(f"\nINTERVIEW STATISTICS:")
-        summary.append(f"- Total witness statements: {len(self.user_statements)}")
-        summary.append(f"- Total questions asked: {len(self.bot_responses)}")
+        summary.append(f"- Total witness statements: {self.stats.statement_count}")
+        summary.append(f"- Total questions asked: {self.stats.response_count}")
         
-        # Calculate average statement length as a simple metric
-        if self.user_statements:
-            avg_length = sum(len(stmt.split()) for stmt in self.user_statements) / len(self.user_statements)
-            summary.append(f"- Average statement length: {avg_length:.1f} words")
+        # Average statement length as a simple metric
+        summary.append(f"- Average statement length: {self.stats.average_statement_length:.1f} words")
         
         # Add topics mentioned
         if self.mentioned_topics:
             summary.append(f"- Topics covered: {', '.join(self.mentioned_topics)}")
+            for topic, hits in self.stats.topic_hits.items():
+                summary.append(f"  - {topic}: {hits}x (turns {self.stats.first_mention[topic]}-{self.stats.last_mention[topic]})")
         
         return "\n".join(summary)
@@ -0,0 +1,164 @@
+import random
+import re
+import zlib
+from array import array
+from collections import deque, namedtuple
+
+# Mersenne prime for the universal hash family of the MinHash permutations
+_PRIME = (1 << 61) - 1
+
+_WORD = re.compile(r"\w+")
+
+# Function and discourse words, a statement that only adds some of these to an earlier one adds no detail
+FILLER = frozenset("""
+    a an the and or but so then to of at on in into onto by for from with about near i me my you your it its we us
+    our this that these those there here is am are was were be been do does did have has had will would can could
+    just like really well um uh oh yeah okay ok already said told say again guess mean
+""".split())
+
+# An earlier statement that a new one nearly repeats
+Duplicate = namedtuple("Duplicate", ["turn", "similarity"])
+
+# (num_hashes, seed) -> hash permutations, identical for every index built with them
+_permutation_cache = {}
+
+def _permutations(num_hashes, seed):
+    permutations = _permutation_cache.get((num_hashes, seed))
+    if permutations is None:
+        rng = random.Random(seed)
+        permutations = tuple((rng.randrange(1, _PRIME), rng.randrange(_PRIME)) for _ in range(num_hashes))
+        _permutation_cache[(num_hashes, seed)] = permutations
+    return permutations
+
+def words(statement, max_words=500):
+    return _WORD.findall(statement.lower())[:max_words]
+
+def shingles(words):
+    """Words and word bigrams of a statement, robust to small rephrasings"""
+    return set(words) | {f"{first} {second}" for first, second in zip(words, words[1:])}
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index over the statements of one interview.
+
+    Every statement becomes a MinHash signature, split into bands that are hashed into
+    buckets. Only statements sharing a bucket are compared, so a lookup costs roughly
+    the same however long the interview is. At most `capacity` statements are indexed,
+    the oldest ones are evicted first.
+
+    A similar statement only counts as a repeat if it adds no detail word the earlier
+    one lacks: "a woman" after "a man", or "10:45" after "10:30", corrects the account.
+    Signatures are built from the detail words only, so "Like I said, ..." still repeats
+    the statement it prefixes. Statements of fewer than `min_words` words ("yes", "no
+    idea") are never repeats, those made only of filler words ("I was there") have no
+    signature and only repeat the same words exactly.
+    """
+
+    __slots__ = ("threshold", "bands", "rows", "capacity", "min_words", "_permutations", "_buckets", "_signatures",
+                 "_details", "_exact", "_exact_keys", "_order")
+
+    def __init__(self, threshold=0.7, num_hashes=32, bands=8, capacity=1000, seed=1, min_words=3):
+        if num_hashes % bands:
+            raise ValueError("num_hashes must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_hashes // bands
+        self.capacity = capacity
+        self.min_words = min_words
+
+        self._permutations = _permutations(num_hashes, seed)  # Shared, only the buckets are per interview
+        self._buckets = [{} for _ in range(bands)]  # band -> band key -> list of turns
+        self._signatures = {}  # turn -> signature
+        self._details = {}  # turn -> detail word hashes
+        self._exact = {}  # normalized text -> latest turn, for statements without a signature
+        self._exact_keys = {}  # turn -> normalized text
+        self._order = deque()  # turns, oldest first
+
+    def __len__(self):
+        return len(self._order)
+
+    def signature(self, statement):
+        """MinHash signature and detail word hashes of a statement, None if it is too short"""
+        statement_words = words(statement)
+        details = [word for word in statement_words if word not in FILLER]
+        if len(statement_words) < self.min_words or not details:
+            return None
+        # crc32 rather than hash(), so signatures do not depend on the process' hash seed
+        hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(details)]
+        # Packed as 64 bit integers, a fraction of the memory of a tuple of ints
+        return (array("Q", [min((a * h + b) % _PRIME for h in hashes) for a, b in self._permutations]),
+                array("I", sorted({zlib.crc32(word.encode("utf-8")) for word in details})))
+
+    def _exact_key(self, statement):
+        """Normalized text of a statement, None if it is too short to ever be a repeat"""
+        statement_words = words(statement)
+        return " ".join(statement_words) if len(statement_words) >= self.min_words else None
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def query(self, statement, signature=None):
+        """Return the most similar earlier statement above the threshold, or None"""
+        signature = signature or self.signature(statement)
+        if signature is None:
+            turn = self._exact.get(self._exact_key(statement))
+            return None if turn is None else Duplicate(turn, 1.0)
+        signature, new_details = signature
+
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        best = None
+        for turn in candidates:
+            similarity = sum(a == b for a, b in zip(signature, self._signatures[turn])) / len(signature)
+            if similarity < self.threshold or not set(new_details).issubset(self._details[turn]):
+                continue
+            if best is None or similarity > best.similarity:
+                best = Duplicate(turn, similarity)
+        return best
+
+    def add(self, statement, turn, signature=None):
+        """Index a statement under its turn number"""
+        signature = signature or self.signature(statement)
+        if signature is None:
+            key = self._exact_key(statement)
+            if key is not None:
+                self._exact[key] = turn
+                self._exact_keys[turn] = key
+                self._order.append(turn)
+                self._evict()
+            return
+        signature, self._details[turn] = signature
+        for band, key in enumerate(self._band_keys(signature)):
+            # Buckets are lists, most hold a single turn and a set would cost four times the memory
+            bucket = self._buckets[band].get(key)
+            if bucket is None:
+                self._buckets[band][key] = [turn]
+            else:
+                bucket.append(turn)
+        self._signatures[turn] = signature
+        self._order.append(turn)
+        self._evict()
+
+    def _evict(self):
+        if len(self._order) > self.capacity:
+            old_turn = self._order.popleft()
+            key = self._exact_keys.pop(old_turn, None)
+            if key is not None:
+                if self._exact[key] == old_turn:  # Not repeated since
+                    del self._exact[key]
+                return
+            del self._details[old_turn]
+            for band, key in enumerate(self._band_keys(self._signatures.pop(old_turn))):
+                bucket = self._buckets[band][key]
+                bucket.remove(old_turn)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def check_and_add(self, statement, turn):
+        """Look up a new statement among the earlier ones, then index it"""
+        signature = self.signature(statement)
+        duplicate = self.query(statement, signature)
+        self.add(statement, turn, signature)
+        return duplicate
@@ -0,0 +1,65 @@
+import re
+import time
+from collections import namedtuple
+from witness_metrics import METRICS
+
+# Declarative fact rules. "triggers" are literals every match of "pattern" contains, they
+# decide which rules are tried at all. "value" is a match.expand() template. Captures are
+# bounded so a search stays linear in the statement length.
+FACT_RULES = [
+    {"fact": "time", "topic": "time", "triggers": ["at "],
+     "pattern": r'at (\d+[:.]\d+|noon|midnight|dawn|dusk)', "value": r"\1"},
+    {"fact": "location", "topic": "location", "triggers": ["at "],
+     "pattern": r'at (the |a )?([\w\s]{1,60}) (street|avenue|road|park|building|store|shop)', "value": r"\2 \3"},
+    {"fact": "person_description", "topic": "person", "triggers": ["man", "person", "individual"],
+     "pattern": r'(man|woman|person|individual) (was |looked |appeared )?([\w\s]{1,80})', "value": r"\3"},
+    {"fact": "event_type", "topic": "event", "triggers": ["robbery", "theft", "assault", "attack", "shooting", "murder", "crime"],
+     "pattern": r'(robbery|theft|assault|attack|shooting|murder|crime)', "value": r"\1"},
+]
+
+# One extracted fact: span is the match position in the lowercased statement
+FactRecord = namedtuple("FactRecord", ["fact", "topic", "value", "turn", "span", "timestamp"])
+
+class FactExtractor:
+    """Extract facts with a rule table compiled once"""
+
+    def __init__(self, rules=FACT_RULES):
+        self.rules = [dict(rule, compiled=re.compile(rule["pattern"])) for rule in rules]
+
+        rules_by_trigger = {}
+        for index, rule in enumerate(self.rules):
+            for trigger in rule["triggers"]:
+                rules_by_trigger.setdefault(trigger, set()).add(index)
+        # Where a trigger occurs, every trigger contained in it occurs as well
+        self._rules_by_trigger = {
+            trigger: set().union(*(rules for other, rules in rules_by_trigger.items() if other in trigger))
+            for trigger in rules_by_trigger
+        }
+        # All triggers in one zero-width alternation: a single scan finds them even where
+        # they overlap, and longest first reports the trigger covering the others at a position
+        triggers = sorted(rules_by_trigger, key=len, reverse=True)
+        self._triggers = re.compile(f"(?=({'|'.join(map(re.escape, triggers))}))")
+
+    def extract(self, statement, turn, timestamp=None):
+        """Return a FactRecord for the first match of every rule, in rule order"""
+        text = statement.lower()
+        timestamp = time.time() if timestamp is None else timestamp
+
+        candidates = set()
+        for trigger in self._triggers.finditer(text):
+            candidates.update(self._rules_by_trigger[trigger.group(1)])
+
+        records = []
+        for index in sorted(candidates):
+            rule = self.rules[index]
+            if METRICS.enabled:
+                start = METRICS.clock()
+                match = rule["compiled"].search(text)
+                METRICS.rule(f"fact:{rule['fact']}", match is not None, METRICS.clock() - start)
+            else:
+                match = rule["compiled"].search(text)
+            if match:
+                records.append(FactRecord(rule["fact"], rule["topic"], match.expand(rule["value"]), turn, match.span(), timestamp))
+        return records
+
+DEFAULT_EXTRACTOR = FactExtractor()
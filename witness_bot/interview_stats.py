@@ -0,0 +1,53 @@
+class InterviewStats:
+    """Running interview statistics, updated per turn so every read is O(1)"""
+
+    __slots__ = ("statement_count", "response_count", "word_count", "longest_statement",
+                 "topic_hits", "first_mention", "last_mention")
+
+    def __init__(self):
+        self.statement_count = 0
+        self.response_count = 0
+        self.word_count = 0
+        self.longest_statement = 0
+        self.topic_hits = {}  # topic -> number of statements mentioning it
+        self.first_mention = {}  # topic -> turn of the first mention
+        self.last_mention = {}  # topic -> turn of the latest mention
+
+    def record_statement(self, statement):
+        """Count a witness statement, returns its turn number"""
+        words = len(statement.split())
+        self.statement_count += 1
+        self.word_count += words
+        self.longest_statement = max(self.longest_statement, words)
+        return self.statement_count
+
+    def record_response(self, response):
+        """Count an officer response"""
+        self.response_count += 1
+
+    def record_topic(self, topic):
+        """Count a topic mention in the current turn"""
+        turn = self.statement_count
+        if self.last_mention.get(topic) == turn:
+            return  # Several hits in one statement count as one mention
+        self.topic_hits[topic] = self.topic_hits.get(topic, 0) + 1
+        self.first_mention.setdefault(topic, turn)
+        self.last_mention[topic] = turn
+
+    @property
+    def average_statement_length(self):
+        return self.word_count / self.statement_count if self.statement_count else 0.0
+
+    def snapshot(self):
+        """Return the current statistics as a plain dict, e.g. for a live dashboard"""
+        return {
+            "statements": self.statement_count,
+            "responses": self.response_count,
+            "words": self.word_count,
+            "average_statement_length": self.average_statement_length,
+            "longest_statement": self.longest_statement,
+            "topics": {
+                topic: {"hits": hits, "first_turn": self.first_mention[topic], "last_turn": self.last_mention[topic]}
+                for topic, hits in self.topic_hits.items()
+            },
+        }
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+class Pacing:
+    """Base pacing policy: decides how long to wait before a response is shown"""
+
+    def delay(self, response):
+        """Return the cosmetic delay in seconds for the given response"""
+        return 0.0
+
+    def pause(self, response):
+        """Block the calling thread for the delay, only meant for console front ends"""
+        seconds = self.delay(response)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    async def apause(self, response):
+        """Wait for the delay without blocking the event loop"""
+        seconds = self.delay(response)
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+class NoPacing(Pacing):
+    """No delay at all, for batch replay, tests and headless use"""
+
+class FixedPacing(Pacing):
+    """The same delay for every response"""
+
+    def __init__(self, seconds=0.5):
+        self.seconds = seconds
+
+    def delay(self, response):
+        return self.seconds
+
+class TypingPacing(Pacing):
+    """Delay proportional to the response length, as if the officer were typing it"""
+
+    def __init__(self, characters_per_second=40.0, minimum=0.3, maximum=3.0):
+        self.characters_per_second = characters_per_second
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def delay(self, response):
+        return min(self.maximum, max(self.minimum, len(response) / self.characters_per_second))
@@ -0,0 +1,234 @@
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from witness_bot import WitnessInterviewBot
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    formal INTEGER NOT NULL,
+    name TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS turns (
+    session_id TEXT NOT NULL REFERENCES sessions(id),
+    turn INTEGER NOT NULL,
+    statement TEXT NOT NULL,
+    response TEXT NOT NULL,
+    time REAL NOT NULL,
+    PRIMARY KEY (session_id, turn)
+);
+"""
+
+# Sentinel telling the writer thread to stop
+_STOP = object()
+
+class SessionStore:
+    """
+    Interview sessions in a local SQLite database (WAL mode).
+
+    Only the turns are stored: facts, topics, statistics and the witness' name are derived
+    from the statements, so resuming a session replays them into a fresh ContextManager.
+    Writes are queued and committed in batches by a background thread, a turn therefore
+    costs the bot one queue put. A write that fails is dropped and reported, the rest of
+    its batch is still committed and later turns are not affected.
+    """
+
+    def __init__(self, path, batch_size=200, flush_interval=0.2):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._error = None  # First write error since the last flush()
+        self.failed_writes = 0
+
+        self._reader = self._connect()
+        self._reader.executescript(SCHEMA)
+        self._read_lock = threading.Lock()
+
+        self._writer = threading.Thread(target=self._write_behind, name="session-store-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints: a power loss may drop the latest commits, never corrupt
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _write_behind(self):
+        """Writer thread: collect queued statements and commit them in one transaction per batch"""
+        connection = self._connect()
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            writes = [item for item in batch if isinstance(item, tuple)]
+            running = _STOP not in batch
+            try:
+                self._commit(connection, writes)
+            finally:
+                for item in batch:
+                    if isinstance(item, threading.Event):
+                        item.set()  # Everything queued before the marker is committed
+                    self._queue.task_done()
+        connection.close()
+
+    def _commit(self, connection, writes):
+        try:
+            with connection:
+                for write in writes:
+                    connection.execute(*write)
+            return
+        except Exception:
+            pass  # Rolled back, find the failing writes by committing one at a time
+        for write in writes:
+            try:
+                with connection:
+                    connection.execute(*write)
+            except Exception as error:
+                self.failed_writes += 1
+                self._error = self._error or error  # Raised in the caller's thread by the next flush()
+                print(f"Dropped session store write {write[0]!r}: {error!r}", file=sys.stderr)
+
+    def _submit(self, sql, parameters):
+        self._queue.put((sql, parameters))
+
+    def _sync(self):
+        """Block until the writes queued so far are committed, later ones from other threads are not waited for"""
+        if not self._writer.is_alive():
+            return
+        marker = threading.Event()
+        self._queue.put(marker)
+        marker.wait()
+
+    def create_session(self, formal=True, session_id=None):
+        """Register a new interview, returns its ID"""
+        session_id = session_id or uuid.uuid4().hex
+        now = time.time()
+        self._submit("INSERT INTO sessions (id, formal, name, created, updated) VALUES (?, ?, NULL, ?, ?)",
+                     (session_id, int(formal), now, now))
+        return session_id
+
+    def record_turn(self, session_id, turn, statement, response, name=None, timestamp=None):
+        """Queue one witness statement and the officer's response"""
+        timestamp = time.time() if timestamp is None else timestamp
+        self._submit("INSERT OR REPLACE INTO turns (session_id, turn, statement, response, time) VALUES (?, ?, ?, ?, ?)",
+                     (session_id, turn, statement, response, timestamp))
+        self._submit("UPDATE sessions SET name = ?, updated = ? WHERE id = ?", (name, timestamp, session_id))
+
+    def flush(self):
+        """Block until every queued write is committed, raises the first write error since the last flush"""
+        self._queue.join()
+        error, self._error = self._error, None
+        if error:
+            raise error
+
+    def load(self, session_id):
+        """Return (formal, name, [(statement, response, time), ...]) of a session, or None"""
+        self._sync()  # Read our own writes
+        with self._read_lock:
+            row = self._reader.execute("SELECT formal, name FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            turns = self._reader.execute(
+                "SELECT statement, response, time FROM turns WHERE session_id = ? ORDER BY turn", (session_id,)).fetchall()
+        return bool(row[0]), row[1], turns
+
+    def session_ids(self):
+        """IDs of all stored sessions, most recently updated first"""
+        self._sync()
+        with self._read_lock:
+            return [row[0] for row in self._reader.execute("SELECT id FROM sessions ORDER BY updated DESC")]
+
+    def new_bot(self, formal=True, session_id=None, **bot_options):
+        """Start a new persistent interview"""
+        session_id = self.create_session(formal, session_id)
+        return WitnessInterviewBot(formal=formal, store=self, session_id=session_id, **bot_options)
+
+    def resume(self, session_id, **bot_options):
+        """Rebuild a stored interview, returns None for an unknown session ID"""
+        stored = self.load(session_id)
+        if stored is None:
+            return None
+        formal, _, turns = stored
+        bot = WitnessInterviewBot(formal=formal, **bot_options)
+        for statement, response, timestamp in turns:
+            bot.replay(statement, response, timestamp)
+        # Attach the store only now, replayed turns are already stored
+        bot.store, bot.session_id = self, session_id
+        return bot
+
+    def close(self):
+        """Commit the remaining writes and stop the writer thread"""
+        if not self._writer.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._reader.close()
+        error, self._error = self._error, None
+        if error:
+            raise error
+
+class ActiveSessions:
+    """
+    The interviews a multi-session process keeps in memory.
+
+    Sessions are loaded from the store on first use and the least recently used ones are
+    dropped beyond max_active. Nothing is lost by dropping one, its turns are in the store.
+    """
+
+    def __init__(self, store, max_active=1000, **bot_options):
+        self.store = store
+        self.max_active = max_active
+        self.bot_options = bot_options
+        self._bots = OrderedDict()  # session ID -> bot, least recently used first
+
+    def __len__(self):
+        return len(self._bots)
+
+    def __contains__(self, session_id):
+        return session_id in self._bots
+
+    def create(self, formal=True):
+        """Start a new interview, returns (session ID, bot)"""
+        bot = self.store.new_bot(formal, **self.bot_options)
+        self._activate(bot.session_id, bot)
+        return bot.session_id, bot
+
+    def get(self, session_id):
+        """Return the bot of a session, loading it if needed, or None for an unknown ID"""
+        bot = self._bots.get(session_id)
+        if bot is not None:
+            self._bots.move_to_end(session_id)
+            return bot
+        bot = self.store.resume(session_id, **self.bot_options)
+        if bot is not None:
+            self._activate(session_id, bot)
+        return bot
+
+    def evict(self, session_id):
+        """Drop a session from memory"""
+        bot = self._bots.pop(session_id, None)
+        if bot is not None:
+            bot.context.close()
+
+    def _activate(self, session_id, bot):
+        self._bots[session_id] = bot
+        while len(self._bots) > self.max_active:
+            self.evict(next(iter(self._bots)))
@@ -0,0 +1,46 @@
+import json
+import os
+import time
+
+class TranscriptWriter:
+    """Append-only JSON lines transcript of an interview"""
+
+    def __init__(self, path, fsync_every=0, buffer_size=64 * 1024):
+        """
+        Every record is flushed to the OS once written, so a crash of the process loses nothing.
+        fsync_every: 0 never forces the file to disk (fast, may lose the tail on power loss),
+        N > 0 forces it to disk after every N records, 1 makes every turn durable.
+        """
+        self.path = path
+        self.fsync_every = fsync_every
+        self._file = open(path, "a", encoding="utf-8", buffering=buffer_size)
+        self._unsynced = 0
+
+    def write(self, turn, role, text):
+        """Append one record to the transcript"""
+        record = {"turn": turn, "role": role, "text": text, "time": time.time()}
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()  # One write call per record, the buffer only joins its pieces
+        if self.fsync_every:
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                self.sync()
+
+    def sync(self):
+        """Force the written records to disk"""
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self.fsync_every:
+            self.sync()
+        self._file.close()
+
+def read_transcript(path):
+    """Stream the records of a transcript file"""
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
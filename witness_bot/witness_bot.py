@@ -1,65 +1,122 @@
+import random
 import re
-import time
 from response_patterns import get_response
+from witness_metrics import METRICS
+from witness_rules import MAX_INPUT_LENGTH
 from context_manager import ContextManager
+from pacing import FixedPacing
+
+# Enhanced name extraction with multiple patterns, bounded so they stay linear on long input
+NAME_PATTERNS = [re.compile(pattern) for pattern in [
+    r'my name is (\w+)',
+    r"i'm (\w+)",
+    r"i am (\w+)",
+    r"\b(\w{1,40}) (is )?my name"
+]]
+
+# Pacing policies hold no state, so one instance serves every bot
+DEFAULT_PACING = FixedPacing(0.5)
 
 class WitnessInterviewBot:
-    def __init__(self, formal=True):
+    # Only the interview state is per bot, rules and pacing are shared
+    __slots__ = ("formal", "rng", "_rules", "context", "name", "pacing", "store", "session_id")
+
+    def __init__(self, formal=True, pacing=None, context=None, store=None, session_id=None, rng=None, rules=None):
         self.formal = formal
-        self.context = ContextManager()
+        self.rng = rng or random  # Pass a random.Random for reproducible replies
+        # Fixed rules, or None to follow the process-wide (hot reloadable) rules of rules.json
+        self._rules = rules
+        self.context = context or ContextManager()
         self.name = None
+        # Cosmetic delay applied by the front end, never inside the turn logic
+        self.pacing = pacing or DEFAULT_PACING
+        # Optional SessionStore the turns are persisted to
+        self.store = store
+        self.session_id = session_id
         
+    def greeting(self):
+        """Return the officer's opening lines"""
+        greeting = "Hello, I'm Officer Davis. I'll be taking your statement today." if self.formal else "Hi there, I'm Officer Davis. I'm here to talk about what you saw."
+        return "\n".join([
+            greeting,
+            "Please take your time and share as many details as you can remember.",
+            "You can end this interview anytime by typing 'exit' or 'quit'.",
+        ])
+
+    def closing(self):
+        """Return the closing remarks including the interview summary"""
+        closing = "Thank you for your statement. This concludes our interview."
+        summary = self.context.get_transcript_summary()
+        if summary:
+            closing += f"\n\nInterview Summary:\n{summary}"
+        return closing
+
     def greet(self):
         print("""
             =============================
             NYPD Witness Interview System
             =============================
         """)
-
-        greeting = "Hello, I'm Officer Davis. I'll be taking your statement today." if self.formal else "Hi there, I'm Officer Davis. I'm here to talk about what you saw."
-        print(f"{greeting}")
-
-        print("Please take your time and share as many details as you can remember.")
-        print("You can end this interview anytime by typing 'exit' or 'quit'.")
+        print(self.greeting())
         print("=============================")
 
-    def process_input(self, user_input):
+    def respond(self, user_input):
+        """Process one witness turn without any console I/O, returns None when the interview ends"""
         # Check for exit command
         if user_input.lower() in ['exit', 'quit', 'end', 'stop']:
             return None
         
+        turn_start = METRICS.clock()
+
         # Save input to context
         self.context.add_user_statement(user_input)
-        
-        # Extract name if not already known
-        if not self.name:
-            # Enhanced name extraction with multiple patterns
-            name_patterns = [
-                r'my name is (\w+)',
-                r"i'm (\w+)",
-                r"i am (\w+)",
-                r"(\w+) (is )?my name"
-            ]
-            
-            for pattern in name_patterns:
-                name_match = re.search(pattern, user_input.lower())
-                if name_match:
-                    self.name = name_match.group(1).capitalize()
-                    self.context.add_fact("name", self.name)
-                    break
+        start = METRICS.clock()
+        self._extract_name(user_input)
+        start = METRICS.lap("name", start)
         
         # Get appropriate response based on input and context
-        response = get_response(user_input, self.context, formal=self.formal, name=self.name)
-        
-        # Add slight delay for natural feel
-        time.sleep(0.5)
+        response = get_response(user_input, self.context, formal=self.formal, name=self.name, rules=self._rules, rng=self.rng)
+        start = METRICS.lap("response", start)
         
         # Save response to context
         self.context.add_bot_response(response)
+        if self.store:
+            self.store.record_turn(self.session_id, self.context.stats.statement_count, user_input, response, self.name)
+        METRICS.lap("record", start)
+        METRICS.lap("turn", turn_start)
         
         return response
+
+    def replay(self, statement, response, timestamp=None):
+        """Restore a recorded turn without generating a new response"""
+        self.context.add_user_statement(statement, timestamp)
+        self._extract_name(statement)
+        self.context.add_bot_response(response)
+
+    def _extract_name(self, user_input):
+        """Extract the witness' name if not already known"""
+        if self.name:
+            return
+        text = user_input.lower()[:MAX_INPUT_LENGTH]
+        for pattern in NAME_PATTERNS:
+            name_match = pattern.search(text)
+            if name_match:
+                self.name = name_match.group(1).capitalize()
+                self.context.add_fact("name", self.name)
+                break
+
+    def process_input(self, user_input):
+        return self.respond(user_input)
+
+    async def respond_paced(self, user_input):
+        """Respond for live async front ends, the pacing delay only suspends this coroutine"""
+        response = self.respond(user_input)
+        if response is not None:
+            await self.pacing.apause(response)
+        return response
     
     def run(self):
+        """Console adapter around respond()"""
         self.greet()
         
         while True:
@@ -67,12 +124,12 @@ class WitnessInterviewBot:
             response = self.process_input(user_input)
             
             if response is None:
-                print("\nThank you for your statement. This concludes our interview.")
-                if self.context.get_transcript_summary():
-                    print("\nInterview Summary:")
-                    print(self.context.get_transcript_summary())
+                print(f"\n{self.closing()}")
+                self.context.close()
                 break
-                
+
+            # Add slight delay for natural feel
+            self.pacing.pause(response)
             print(f"\nOfficer Davis: {response}")
 
 if __name__ == "__main__":
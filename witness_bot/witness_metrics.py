@@ -0,0 +1,12 @@
+import os
+import sys
+
+# stage_metrics.py is shared with the Pal bots, it lives in shared/ next to the bot directories
+SHARED_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shared")
+if SHARED_DIR not in sys.path:
+    sys.path.insert(0, SHARED_DIR)
+
+from stage_metrics import Metrics
+
+# Process-wide metrics of all interviews, disabled until enabled
+METRICS = Metrics(prefix="witness")
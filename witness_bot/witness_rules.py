@@ -0,0 +1,147 @@
+import os
+import re
+import sys
+import threading
+from collections import Counter
+
+# rule_bundles.py is shared with the Pal bots, it lives in shared/ next to the bot directories
+SHARED_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shared")
+if SHARED_DIR not in sys.path:
+    sys.path.insert(0, SHARED_DIR)
+
+import rule_bundles
+from rule_bundles import RuleRegistry
+
+try:
+    import re2  # Optional automaton (DFA) backend, pip install google-re2
+except ImportError:
+    re2 = None
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__")
+
+# Bump when the layout of WitnessRules changes, older cache files are then ignored
+CACHE_VERSION = 4
+
+# Matching only looks at the start of very long statements, which bounds the cost per turn
+MAX_INPUT_LENGTH = 2000
+
+class PatternSet:
+    """Compiled response patterns, tried in order on the prepared input"""
+
+    def __init__(self, patterns, max_input_length=MAX_INPUT_LENGTH, backend="re"):
+        """
+        backend: "re" for Python's regex engine or "re2" for the linear-time automaton
+        engine of the optional google-re2 package.
+        """
+        if backend not in ("re", "re2"):
+            raise ValueError(f"Unknown pattern backend {backend!r}")
+        if backend == "re2" and re2 is None:
+            raise ImportError("The re2 backend needs the google-re2 package")
+        self.backend = backend
+        self.max_input_length = max_input_length
+        self._compile(patterns)
+
+    def _compile(self, patterns):
+        engine = re2 if self.backend == "re2" else re
+        self.patterns = [(engine.compile(pattern), responses) for pattern, responses in patterns]
+
+    def __getstate__(self):
+        # re2 patterns cannot be pickled, the sources are compiled again after loading
+        state = self.__dict__.copy()
+        state["patterns"] = [(pattern.pattern, responses) for pattern, responses in self.patterns]
+        return state
+
+    def __setstate__(self, state):
+        patterns = state.pop("patterns")
+        self.__dict__.update(state)
+        self._compile(patterns)
+
+    def __iter__(self):
+        return iter(self.patterns)
+
+    def prepare(self, user_input):
+        """Lowercase the input and apply the length guard"""
+        text = user_input.lower()
+        if self.max_input_length:
+            text = text[:self.max_input_length]
+        return text
+
+    def match(self, user_input):
+        """Return (match, responses) for the first matching pattern or (None, None)"""
+        text = self.prepare(user_input)
+        for pattern, responses in self.patterns:
+            match = pattern.search(text)
+            if match:
+                return match, responses
+        return None, None
+
+def _responses(section, responses):
+    if not responses or not all(isinstance(response, str) for response in responses):
+        raise ValueError(f"{section} needs a non-empty list of responses")
+    return tuple(responses)
+
+class WitnessRules:
+    """
+    The compiled rule bundle of the witness bot (see rules.json).
+
+    Response patterns should keep their captures bounded, the bundled ones are the
+    linear-time rewrites of the original open-ended patterns. A rule set is never
+    modified once built, only its hit counters, which count() updates under a lock.
+    """
+
+    def __init__(self, bundle, max_input_length=MAX_INPUT_LENGTH, backend="re"):
+        self.digest = None  # SHA-256 of the bundle source, set by load_rules()
+        self.generation = 0  # Set when the rules are installed as the process-wide rules
+        self.hits = Counter()  # Response pattern (or "reflective") -> turns answered by it
+        self._lock = threading.Lock()  # HTTP worker threads share the process-wide rules
+        self.patterns = PatternSet(
+            [(rule["pattern"], _responses(f"Pattern {rule['pattern']!r}", rule["responses"])) for rule in bundle["patterns"]],
+            max_input_length,
+            backend,
+        )
+        self.reflective_prompts = {
+            style: _responses(f"reflective_prompts.{style}", bundle["reflective_prompts"][style])
+            for style in ("formal", "informal")
+        }
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]  # Locks cannot be pickled
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def count(self, rule):
+        """Count one turn answered by a rule"""
+        with self._lock:
+            self.hits[rule] += 1
+
+    def snapshot(self):
+        """Return the generation and its hit counters as a plain dict"""
+        with self._lock:
+            hits = dict(self.hits)
+        return {"generation": self.generation, "digest": self.digest, "hits": hits}
+
+def load_rules(path=RULES_PATH, cache_dir=CACHE_DIR, backend="re"):
+    """
+    Load a rule bundle, from the precompiled cache if the bundle did not change.
+
+    backend: pattern engine, see PatternSet. cache_dir=None always compiles.
+    """
+    return rule_bundles.load_bundle(path, cache_dir, lambda bundle: WitnessRules(bundle, backend=backend),
+                                    f"witness-rules-{CACHE_VERSION}-{backend}")
+
+# The process-wide rules shared by all bots, the bundled ones unless others were installed
+_registry = RuleRegistry(load_rules)
+default_rules = _registry.default
+install_rules = _registry.install
+
+class RuleReloader(rule_bundles.RuleReloader):
+    """Watch a witness rule bundle and hot swap the process-wide rules when it changes"""
+
+    def __init__(self, path=RULES_PATH, interval=1.0, cache_dir=CACHE_DIR, history=5, backend="re"):
+        super().__init__(_registry, lambda path, cache_dir: load_rules(path, cache_dir, backend), path, interval,
+                         cache_dir, history)
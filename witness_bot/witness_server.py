@@ -0,0 +1,296 @@
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from pacing import NoPacing
+from witness_bot import WitnessInterviewBot
+from witness_rules import MAX_INPUT_LENGTH, install_rules, load_rules
+
+EXIT_COMMANDS = {"exit", "quit", "end", "stop"}
+
+class InterviewSession:
+    """One interview: the bot, its own random generator and the lock serializing its turns"""
+    __slots__ = ("id", "bot", "lock", "turns", "last_active")
+
+    def __init__(self, session_id, bot):
+        self.id = session_id
+        self.bot = bot
+        self.lock = threading.Lock()
+        self.turns = 0
+        self.last_active = time.monotonic()
+
+    def respond(self, text):
+        """Answer one turn, returns (reply, turn number); concurrent turns of an interview run one after another"""
+        with self.lock:
+            self.turns += 1
+            self.last_active = time.monotonic()
+            return self.bot.respond(text), self.turns
+
+class SessionRegistry:
+    """
+    The interviews of all terminals, safe to use from any worker thread.
+
+    Every session gets its own bot, ContextManager and random.Random, so worker threads
+    never share interview state: the registry lock only guards the session table and a
+    session's lock only its own turns. With a seed, session n draws from
+    Random(f"{seed}:{n}") and a replayed load gets the same replies.
+    """
+
+    def __init__(self, max_sessions=1000, idle_timeout=1800.0, seed=None):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.seed = seed
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._numbers = itertools.count(1)
+        self.stats = {"sessions_started": 0, "sessions_rejected": 0, "sessions_expired": 0, "turns": 0}
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _rng(self, number):
+        return random.Random() if self.seed is None else random.Random(f"{self.seed}:{number}")
+
+    def create(self, formal=True):
+        """Start an interview, returns None when the registry is full"""
+        self.expire()
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                self.stats["sessions_rejected"] += 1
+                return None
+            number = next(self._numbers)
+            session_id = uuid.uuid4().hex if self.seed is None else f"s{number}"
+            bot = WitnessInterviewBot(formal=formal, pacing=NoPacing(), rng=self._rng(number))
+            session = self._sessions[session_id] = InterviewSession(session_id, bot)
+            self.stats["sessions_started"] += 1
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def close(self, session_id):
+        """End an interview, returns its session or None"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            with session.lock:  # Let a running turn finish first
+                session.bot.context.close()
+        return session
+
+    def expire(self):
+        """Close the interviews idle for longer than idle_timeout"""
+        deadline = time.monotonic() - self.idle_timeout
+        with self._lock:
+            expired = [session_id for session_id, session in self._sessions.items() if session.last_active < deadline]
+        for session_id in expired:
+            if self.close(session_id) is not None:
+                with self._lock:
+                    self.stats["sessions_expired"] += 1
+
+    def count_turn(self):
+        with self._lock:
+            self.stats["turns"] += 1
+
+class WitnessRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON API of the interview service:
+
+        POST   /sessions               {"formal": true}  -> 201 {"session", "greeting"}
+        POST   /sessions/<id>/turns    {"text": "..."}   -> 200 {"reply", "turn", "done"}
+        GET    /sessions/<id>                            -> 200 {"session", "name", "turns", "facts"}
+        DELETE /sessions/<id>                            -> 200 {"closing", "done"}
+        GET    /health                                   -> 200 {"sessions", "stats"}
+
+    An exit command as turn text ends the interview like DELETE does. Every request uses
+    its own connection (HTTP/1.0), and a connection that stalls for the server's
+    request_timeout is dropped, so an idle terminal holds a pool worker at most that long.
+    """
+    server_version = "WitnessInterview/1.0"
+    max_body = 4 * MAX_INPUT_LENGTH
+
+    def setup(self):
+        self.timeout = self.server.request_timeout  # Socket timeout of every read and write
+        super().setup()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send(status, {"error": message})
+
+    def _read_json(self):
+        """Return the JSON object of the request body, or None after answering with an error"""
+        length = self.headers.get("Content-Length") or "0"
+        if not length.isdigit() or not length.isascii():
+            self._error(400, "Content-Length must be a non-negative integer")
+            return None
+        length = int(length)
+        if length > self.max_body:
+            self._error(413, f"Request bodies are limited to {self.max_body} bytes")
+            return None
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            self._error(400, "The request body must be JSON")
+            return None
+        if not isinstance(payload, dict):
+            self._error(400, "The request body must be a JSON object")
+            return None
+        return payload
+
+    def _path(self):
+        return [part for part in self.path.split("?", 1)[0].split("/") if part]
+
+    def _session(self, session_id):
+        session = self.server.registry.get(session_id)
+        if session is None:
+            self._error(404, f"Unknown session {session_id}")
+        return session
+
+    def do_POST(self):
+        path = self._path()
+        if path == ["sessions"]:
+            payload = self._read_json()
+            if payload is None:
+                return
+            session = self.server.registry.create(formal=bool(payload.get("formal", True)))
+            if session is None:
+                self._error(503, "All interview slots are taken, please try again later")
+                return
+            self._send(201, {"session": session.id, "greeting": session.bot.greeting()})
+        elif len(path) == 3 and path[0] == "sessions" and path[2] == "turns":
+            payload = self._read_json()
+            if payload is None:
+                return
+            text = payload.get("text")
+            if not isinstance(text, str):
+                self._error(400, "A turn needs a text")
+                return
+            session = self._session(path[1])
+            if session is None:
+                return
+            if text.strip().lower() in EXIT_COMMANDS:
+                self._close(session)
+                return
+            reply, turn = session.respond(text)
+            self.server.registry.count_turn()
+            self._send(200, {"reply": reply, "turn": turn, "done": False})
+        else:
+            self._error(404, "Not found")
+
+    def do_GET(self):
+        path = self._path()
+        if path == ["health"]:
+            registry = self.server.registry
+            self._send(200, {"sessions": len(registry), "stats": dict(registry.stats)})
+        elif len(path) == 2 and path[0] == "sessions":
+            session = self._session(path[1])
+            if session is None:
+                return
+            with session.lock:
+                context = session.bot.context
+                self._send(200, {"session": session.id, "name": session.bot.name, "turns": session.turns,
+                                 "facts": dict(context.facts)})
+        else:
+            self._error(404, "Not found")
+
+    def do_DELETE(self):
+        path = self._path()
+        if len(path) == 2 and path[0] == "sessions":
+            session = self._session(path[1])
+            if session is not None:
+                self._close(session)
+        else:
+            self._error(404, "Not found")
+
+    def _close(self, session):
+        with session.lock:
+            closing = session.bot.closing()
+        self.server.registry.close(session.id)
+        self._send(200, {"closing": closing, "done": True})
+
+class WitnessHTTPServer(HTTPServer):
+    """
+    HTTPServer answering requests on a bounded pool of worker threads.
+
+    Unlike ThreadingHTTPServer, which starts a thread per connection, at most `workers`
+    requests run at once; further connections wait in the pool queue (at most `backlog`
+    of them) and then in the listen backlog, so a burst cannot exhaust threads or memory.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, registry, workers=8, backlog=256, verbose=False, request_timeout=10.0):
+        self.request_queue_size = backlog  # listen() backlog, the default of 5 resets bursts of terminals
+        super().__init__(address, WitnessRequestHandler)
+        self.registry = registry
+        self.request_timeout = request_timeout
+        self.verbose = verbose
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="witness-http")
+        self._slots = threading.BoundedSemaphore(workers + backlog)
+
+    def process_request(self, request, client_address):
+        self._slots.acquire()  # Blocks the accept loop while the pool is saturated
+        self._pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve witness interviews over HTTP/JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766, help="0 picks a free port")
+    parser.add_argument("--workers", type=int, default=8, help="worker threads answering requests")
+    parser.add_argument("--max-sessions", type=int, default=1000)
+    parser.add_argument("--idle-timeout", type=float, default=1800.0, help="seconds before an idle interview is closed")
+    parser.add_argument("--seed", type=int, help="seed the sessions' random generators for reproducible replies")
+    parser.add_argument("--request-timeout", type=float, default=10.0,
+                        help="seconds a connection may stall before it is dropped and its worker freed")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    parser.add_argument("--backend", choices=("re", "re2"), default="re",
+                        help="pattern engine, re2 (linear time) needs the google-re2 package")
+    args = parser.parse_args()
+
+    try:
+        install_rules(load_rules(backend=args.backend))  # Load the rules before the first request instead of in a worker
+    except ImportError as error:
+        parser.error(str(error))
+    registry = SessionRegistry(args.max_sessions, args.idle_timeout, args.seed)
+    server = WitnessHTTPServer((args.host, args.port), registry, workers=args.workers, verbose=args.verbose,
+                               request_timeout=args.request_timeout)
+    host, port = server.server_address[:2]
+    print(f"Witness interviews are served on http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()